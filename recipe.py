@@ -5,21 +5,48 @@ import sys
 import random
 import math
 import time
+import argparse
+import multiprocessing
+import json
+import collections
+import socket
+import socketserver
+import threading
+import contextlib
+import select
+import atexit
+import struct
+import pickle
+import io
+import zlib
+import tempfile
+import asyncio
+import sqlite3
+import tracemalloc
+import timeit
+import platform
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class BadInputError(Exception):
     pass
 
 class Player:
 
+    strategy = 'human'      #    How moves are chosen, for MatchStats
+
     def __init__(self, name):
         self.id = None
         self.name = name
         self.type = 'Human'
         self.hand = Hand()
-        self.legal_cards = []
-        self.wild_cards = []
-        self.value_change_cards = []
-        self.zero_cards = []
+        self.legal_mask = 0                  #    Card code bitmasks, see get_legal_cards
+        self.wild_mask = 0
+        self.value_change_mask = 0
+        self.zero_mask = 0
         self.can_skip = False
         self.can_reverse = False
         self.can_draw_two = False
@@ -29,6 +56,7 @@ class Player:
         self.scroll_max = 0
         self.points = 0
         self.force_draw = 0
+        self.source = None                   #    DecisionSource typing for this player, None for the match's
 
     def add_card(self, card):
         self.drew = True
@@ -44,49 +72,58 @@ class Player:
         return self.drew
         
     def get_legal_cards(self, color, value, zero_change=False):
-        self.can_skip = False
-        self.can_reverse = False
-        self.can_draw_two = False
-        self.can_draw_four = False
-        self.can_value_change = False
-        self.can_zero_change = False
-        self.legal_cards = []
-        self.wild_cards = []
-        self.value_change_cards = []
-        self.zero_cards = []
-        plus_fours = []
-        for card in self.hand:
-            if card.is_wild():
-                if card.get_value() == '+4':
-                    plus_fours.append(card)
-                else:
-                    self.wild_cards.append(card)
-            elif zero_change and card.isZero():
-                self.can_zero = True
-                self.zero_cards.append(card)
-            elif card.get_color() == color or card.get_value() == value:
-                if card.get_color() != color:
-                    self.can_value_change = True
-                    self.value_change_cards.append(card)
-                if card.get_value() == "+2":
-                    self.can_draw_two = True
-                elif card.get_value() == 'R':
-                    self.can_reverse = True
-                elif card.get_value() == 'X':
-                    self.can_skip = True
-                self.legal_cards.append(card)
-        if len(self.legal_cards) == 0 and len(plus_fours) > 0:
-            self.can_draw_four = True
-            self.wild_cards += plus_fours
-                
+        '''Sets the playable card masks and flags for a pile showing 'color' and 'value'.
+
+        Only bitwise operations between the hand's card code mask and the
+        precomputed tables, so the cost does not depend on hand size.'''
+        hand_mask = self.hand.mask
+        playable = LEGAL_MASKS[(color, value)]
+        if zero_change:
+            self.zero_mask = hand_mask & ZERO_MASK
+            playable &= ~ZERO_MASK
+        else:
+            self.zero_mask = 0
+        legal = hand_mask & playable
+        self.legal_mask = legal
+        self.value_change_mask = legal & ~COLOR_MASKS[color]
+        self.can_skip = bool(legal & SKIP_MASK)
+        self.can_reverse = bool(legal & REVERSE_MASK)
+        self.can_draw_two = bool(legal & DRAW_TWO_MASK)
+        self.can_value_change = bool(self.value_change_mask)
+        self.can_zero_change = bool(self.zero_mask)
+        self.can_draw_four = not legal and bool(hand_mask & DRAW_FOUR_MASK)
+        self.wild_mask = hand_mask & (WILD_MASK | DRAW_FOUR_MASK if self.can_draw_four else WILD_MASK)
+
+    @property
+    def legal_cards(self):
+        return self.hand.get_cards(self.legal_mask)
+
+    @property
+    def wild_cards(self):
+        return self.hand.get_cards(self.wild_mask)
+
+    @property
+    def value_change_cards(self):
+        return self.hand.get_cards(self.value_change_mask)
+
+    @property
+    def zero_cards(self):
+        return self.hand.get_cards(self.zero_mask)
+
     def get_valid_cards(self):
         return self.legal_cards
     
     def get_all_valid_cards(self):
-        return self.legal_cards + self.wild_cards + self.zero_cards
+        return self.hand.get_cards(self.legal_mask | self.wild_mask | self.zero_mask)
                 
     def has_legal_card(self):
-        return len(self.legal_cards) > 0
+        return self.legal_mask != 0
+
+    def has_valid_card(self):
+        return (self.legal_mask | self.wild_mask | self.zero_mask) != 0
+
+    def is_valid_card(self, card):
+        return bool((self.legal_mask | self.wild_mask | self.zero_mask) >> card.code & 1)
         
     def add_points(self, amount):
         if (self.points + amount) <= 999999999999999999999:
@@ -146,6 +183,14 @@ class Hand:
 
     def __init__(self, deck=None, number_of_cards=0):
         self.hand = []
+        self.counts = [0]*len(CARD_KINDS)   #    Card Code : Copies in Hand
+        self.buckets = [[] for code in CARD_KINDS]     #    Card Code : Cards in Hand
+        self.positions = {}                 #    Card : Index in hand, so a bucketed card needs no search
+        self.color_counts = {'red':0, 'blue':0, 'green':0, 'yellow':0, 'wild':0}
+        self.mask = 0                       #    Bit per card code held
+        self.version = 0                    #    Bumped on every change, invalidates pages
+        self.pages = {}                     #    (Scroll, Hide) : show() output
+        self.pages_version = 0
         if deck != None:
             self.draw(deck, number_of_cards)
 
@@ -162,19 +207,76 @@ class Hand:
             return ''
 
     def add_card(self, card):
+        self.positions[card] = len(self.hand)
         self.hand.append(card) 
+        self.counts[card.code] += 1
+        self.buckets[card.code].append(card)
+        self.color_counts[card.get_color()] += 1
+        self.mask |= 1 << card.code
+        self.version += 1
         
     def remove_card(self, index):
         index = int(index)
         if (0 <= index < len(self)):
-            return self.hand.pop(index)      
+            card = self.hand.pop(index)
+            del self.positions[card]
+            for held in self.hand[index:]:
+                self.positions[held] -= 1
+            self.counts[card.code] -= 1
+            self.buckets[card.code].remove(card)
+            self.color_counts[card.get_color()] -= 1
+            if self.counts[card.code] == 0:
+                self.mask &= ~(1 << card.code)
+            self.version += 1
+            return card
+
+    def insert_card(self, index, card):
+        '''Puts a card taken by remove_card back at 'index'.'''
+        position = 0
+        for held in self.hand[:index]:
+            if held.code == card.code:
+                position += 1
+        for held in self.hand[index:]:
+            self.positions[held] += 1
+        self.hand.insert(index, card)
+        self.positions[card] = index
+        self.counts[card.code] += 1
+        self.buckets[card.code].insert(position, card)
+        self.color_counts[card.get_color()] += 1
+        self.mask |= 1 << card.code
+        self.version += 1
 
     def discard(self):
         self.hand = []
+        self.counts = [0]*len(CARD_KINDS)
+        self.buckets = [[] for code in CARD_KINDS]
+        self.positions = {}
+        self.color_counts = {'red':0, 'blue':0, 'green':0, 'yellow':0, 'wild':0}
+        self.mask = 0
+        self.version += 1
+
+    def invalidate(self):
+        '''Drops the pages show() has cached, as any change to the hand does.'''
+        self.version += 1
+
+    def get_cards(self, mask):
+        '''Returns the cards whose codes are in 'mask', in hand order.'''
+        if mask == 0:
+            return []
+        return [card for card in self.hand if mask >> card.code & 1]
 
     def show(self, scrollNum=0, hide=False):
         if scrollNum == -1:
             scrollNum = 0
+        if self.pages_version != self.version:
+            self.pages.clear()
+            self.pages_version = self.version
+        key = (scrollNum, hide)
+        if key not in self.pages:
+            self.pages[key] = self.build_page(scrollNum, hide)
+        return self.pages[key]
+
+    def build_page(self, scrollNum, hide):
         output = ''
         num = 0
         header, footer, upper, lower = '', '', '', ''
@@ -214,12 +316,19 @@ class Hand:
         return self.hand[index]
     
     def index_card(self, card):
-        return self.hand.index(card)
+        return self.positions[card]
 
 class GameSettings:
     
-    player_identities = ('play1','play2','play3','play4')
-    computer_names = ('Watson','SkyNet','Hal','Metal Gear')
+    max_players = 10
+    player_identities = tuple('play{}'.format(seat) for seat in range(1, max_players+1))
+    computer_names = ('Watson','SkyNet','Hal','Metal Gear','Deep Blue','Ultron','Jarvis','Cortana','Bender','Data')
+    computer_think_times = (0.0, 0.5, 1.0, 2.0)
+    default_animation_budgets = {'deal':1.4, 'reverse':2.0, 'skip':2.2, 'wild':1.0, 'tally':1.5}    #    Seconds
+    default_save_path = os.path.join(os.path.expanduser('~'), '.uno_save')
+    default_score_path = os.path.join(os.path.expanduser('~'), '.uno_scores.db')     #    Read by the scores command without --scores
+    high_score_rows = 9                         #    Lines in the main menu's High Scores panel
+    runtime_settings = ('use_color', 'log_dir', 'save_path', 'decision_source', 'score_path', 'score_store', 'match_stats')     #    Not saved with a match
     
     def __init__(self):
         self.player_staging = []                  #    Where Player Objs Are Stored Before Game Starts
@@ -229,18 +338,39 @@ class GameSettings:
         self.display_effects = True
         self.hide_computer_hands = True
         self.zero_change = False
+        self.reshuffle_pile = False                #    Shuffle the pile back in when the deck runs out
         self.computer_simulation = False
         self.main_menu_error = ''
         self.computer_speed = 'normal'
+        self.computer_think_time = 0.0             #    Seconds of search per move, 0 for the quick heuristic
+        self.animation_fps = 30
+        self.animation_budgets = dict(self.default_animation_budgets)
+        self.log_dir = None                        #    Directory match logs are saved to, None to keep none
+        self.save_path = self.default_save_path    #    Where the pause screen saves a match
+        self.decision_source = None                #    DecisionSource for breaks and humans without one, None for stdin
+        self.score_path = None                     #    ScoreStore database, None to keep no scores
+        self.match_stats = None                    #    MatchStats fed every finished match, if any
+        self.score_store = None
         
+    def carry_runtime_settings(self, other):
+        '''Copies the runtime_settings of 'other', such as a session's, onto these.'''
+        for key in self.runtime_settings:
+            setattr(self, key, getattr(other, key))
+
     def can_add_player(self):
-        return (self.num_players < 4)
+        return (self.num_players < self.max_players)
     
     def can_remove_player(self):
         return (self.num_players > 0)
     
     def can_begin(self):
         return (self.num_players > 1)
+
+    def computers_only(self):
+        for player in self.player_staging:
+            if player.get_type() != 'Computer':
+                return False
+        return True
         
     def add_player(self, player):
         self.player_staging.append(player)
@@ -314,16 +444,34 @@ class GameSettings:
             j
             colorCode = ['\033[91m','\033[94m','\033[92m','\033[93m']
             key = player_box_key.format(i)
-            self.main_menu_elements[key] = colorCode[i-1]
+            self.main_menu_elements[key] = colorCode[(i-1) % 4]
             self.main_menu_elements[player_row_key.format(i,1)] = get_player_box(i, 1)
             self.main_menu_elements[player_row_key.format(i,2)] = get_player_box(i, 2)
             i+=1
+        ### Compact List, Two Seats a Line, for Tables Beyond Four ###
+        player_list = []
+        for i in range(0, self.num_players, 2):
+            line = ''
+            for number in range(i+1, min(i+3, self.num_players+1)):
+                player = self.player_staging[number-1]
+                line += ' {}{:>2}. {}{}{:>9} pts\033[0m'.format(self.main_menu_elements[player_box_key.format(number)], number,
+                                                             player.get_name(), get_blank_space(player.get_name(), 12), player.get_points())
+            player_list.append(line)
+        self.main_menu_elements['playerList'] = player_list + ['']*(8-len(player_list))
         if self.can_begin():
             self.main_menu_elements['beginBox'] = '\033[95m'
         if not self.can_add_player():
             self.main_menu_elements['addBox'] = '\033[90m'
         if self.can_remove_player():
             self.main_menu_elements['removeBox'] = '\033[97m'
+        self.main_menu_elements['resumeBox'] = '\033[97m' if os.path.exists(self.save_path) else '\033[90m'
+        high_scores = []
+        store = self.get_score_store()
+        if store != None:
+            for rank, row in enumerate(store.top(self.high_score_rows), 1):
+                name, points = row[0][:12], row[1]
+                high_scores.append(' {}. {}{}{:>9} '.format(rank, name, get_blank_space(name, 12), points)[:27])
+        self.main_menu_elements['highScores'] = [row + get_blank_space(row, 27) for row in high_scores + ['']*(self.high_score_rows-len(high_scores))]
             
     def change_computer_speed(self):
         if self.computer_speed == 'slow':
@@ -332,37 +480,59 @@ class GameSettings:
             self.computer_speed = 'fast'
         elif self.computer_speed == 'fast':
             self.computer_speed = 'slow'
+
+    def change_computer_think_time(self):
+        times = self.computer_think_times
+        self.computer_think_time = times[(times.index(self.computer_think_time) + 1) % len(times)]
     
     def get_main_menu_elements(self):
         return self.main_menu_elements
 
+    def get_score_store(self):
+        '''Opens the ScoreStore on first use; returns None if there is none or it cannot be opened.'''
+        if self.score_store == None and self.score_path != None:
+            try:
+                self.score_store = ScoreStore(self.score_path)
+            except Exception:
+                self.score_path = None
+        return self.score_store
+
 class Deck:
     ''''shuffle' (bool) : shuffle deck.'''
 
     colors =     ('red','yellow','green','blue')
     values =     ('0','1','2','3','4','5','6','7','8','9','X','R','+2')
+    players_per_deck = 5        #    Seats dealt from each 108 card deck in a shoe
     
-    def __init__(self, populate):
-        '''Initializes proper deck of 108 Uno Cards.'''
+    def __init__(self, populate, rng=None, decks=1):
+        '''Initializes a shoe of 'decks' proper decks of 108 Uno Cards, shuffled with 'rng' (random.Random).'''
         self.deck = []
+        self.decks = decks
         if populate:
-            self.populate(True)
+            self.populate(True, rng)
+
+    @classmethod
+    def shoe_size(cls, players):
+        '''Returns how many decks a table of 'players' is dealt from.'''
+        return max(1, int(math.ceil(players / cls.players_per_deck)))
             
     def __getitem__(self, index):
         return self.deck[index]
             
-    def populate(self, shuffle=True):
-        for color in self.colors:
-            for value in self.values:
-                self.deck.append(Card(color, value))
-                if value != '0':
+    def populate(self, shuffle=True, rng=None):
+        for deck in range(self.decks):
+            deck #unused
+            for color in self.colors:
+                for value in self.values:
                     self.deck.append(Card(color, value))
-        for i in range(4):
-            i #unused
-            self.deck.append(Card('wild', '+4'))
-            self.deck.append(Card('wild', 'W'))
+                    if value != '0':
+                        self.deck.append(Card(color, value))
+            for i in range(4):
+                i #unused
+                self.deck.append(Card('wild', '+4'))
+                self.deck.append(Card('wild', 'W'))
         if shuffle:
-            self.shuffle()
+            self.shuffle(rng)
 
     def __iter__(self):
         return iter(self.deck)
@@ -379,75 +549,111 @@ class Deck:
     def insert(self, card):
         self.deck.insert(0, card)
 
-    def shuffle(self):
-        random.shuffle(self.deck)
+    def shuffle(self, rng=None):
+        (rng or random).shuffle(self.deck)
+
+class Pile:
+    '''The discard pile, top card first.
+
+    Backed by a deque, so playing a card, taking it back and recycling the
+    cards beneath the top each cost O(1) per card however long the match runs.'''
+
+    def __init__(self):
+        self.pile = collections.deque()
+
+    def __getitem__(self, index):
+        return self.pile[index]
+
+    def __iter__(self):
+        return iter(self.pile)
+
+    def __len__(self):
+        return len(self.pile)
+
+    def insert(self, card):
+        '''Plays 'card' onto the top.'''
+        self.pile.appendleft(card)
+
+    def take(self):
+        '''Removes and returns the top card.'''
+        return self.pile.popleft()
+
+    def place(self, card):
+        '''Slides 'card' under the bottom.'''
+        self.pile.append(card)
+
+    def recycle(self):
+        '''Removes and returns every card beneath the top one, top first.'''
+        cards = []
+        while len(self.pile) > 1:
+            cards.append(self.pile.pop())
+        cards.reverse()
+        return cards
 
 class ComputerPlayer(Player):
+
+    endgame_cards = 12      #    Most cards left in all hands for think() to solve exactly
+    strategy = 'heuristic'
     
     def __init__(self, name):
         super().__init__(name)
         self.type = 'Computer'
         self.begun = False
-        self.colors_in_hand = {'red':0, 'blue':0, 'green':0, 'yellow':0, 'wild':0}
-        self.colors_out_hand = {}
         self.current_color = ""
+        self.wild_choice = None              #    Deck.colors index picked along with the last wild played
+
+    @property
+    def colors_in_hand(self):
+        return self.hand.color_counts
         
-    def add_card(self, card):
-        Player.add_card(self, card)
-        color = card.get_color()
-        self.colors_in_hand[color] += 1
-        
-    def index_card(self, card_color, card_value):
-        for card in self.hand:
-            if card.get_value() == card_value:
-                if card_value in ('+4', 'W'):
-                    return self.hand.index_card(card)
-                else:
-                    if card.get_color() == card_color:
-                        return self.hand.index_card(card)
-        raise ValueError("Card Cannot Be Found")
+    def index_code(self, code):
+        '''Returns the hand position of a card with the given code.'''
+        bucket = self.hand.buckets[code]
+        if not bucket:
+            raise ValueError("Card Cannot Be Found")
+        return self.hand.index_card(bucket[0])
         
     def think(self, match):
-        card = None
+        code = None
         self.current_color = match.current_color
         current_value = match.current_value
         zero_change_rule = match.zero_change
-        two_players = False
         previous_turn_id = match.get_next_turn(True)
         next_turn_id = match.get_next_turn(False)
         previous_player = match.get_player(previous_turn_id)
         #nextPlayer = match.get_player(nextTurnID)
-        if previous_turn_id == next_turn_id:
-            two_players = True
-            if self.can_skip == False and self.can_reverse == True:
-                self.can_skip = True
-            self.can_reverse = False
+        two_players = previous_turn_id == next_turn_id
         
         self.get_legal_cards(self.current_color, current_value, zero_change_rule)
 
         ### DRAW CASE ###
         
-        if len(self.legal_cards) == 0 and len(self.wild_cards) == 0:
+        if not self.legal_mask and not self.wild_mask:
             return "d"
+
+        ### DECK EMPTY, SOLVE EXACTLY ###
+
+        move = self.solve_endgame(match)
+        if move != None:
+            return self.play_move(move)
         
         else:
             
             ### NO LEGAL CARD, USE WILD CARD ###
             
-            if len(self.legal_cards) == 0:
+            if not self.legal_mask:
                 
                 if zero_change_rule and self.can_zero_change:
-                    best_zero_color = self.get_best_color(self.zero_cards)
-                    card = self.get_card_by_color(self.zero_cards, best_zero_color)
+                    best_zero_color = self.get_best_color(self.zero_mask)
+                    code = self.get_code_by_color(self.zero_mask, best_zero_color)
                     
                 else:
                     
                     if self.can_draw_four:
-                        card = self.get_card_by_value(self.wild_cards, "+4")
-                        print(card)
+                        code = DRAW_FOUR_CODE
                         
                     else:
-                        card = random.choice(self.wild_cards)
+                        code = WILD_CODE
                 
             else:
                 
@@ -455,66 +661,174 @@ class ComputerPlayer(Player):
                 
                 if two_players and self.can_skip: #Always play a skip card in a two player game
                     #print("Shed Skip Strategy")
-                    card = self.get_card_by_value(self.legal_cards,"R", "X")
+                    code = lowest_code(self.legal_mask & (SKIP_MASK | REVERSE_MASK))
                     
                 if self.can_reverse and previous_player.did_draw():
                     #print("Reverse Strategy")
-                    reverse_cards = self.get_all_cards_by_value(self.legal_cards, "R")
-                    for reverse_card in reverse_cards:
-                        if reverse_card.get_color() == self.current_color:
-                            card = reverse_card
+                    reverse_mask = self.legal_mask & REVERSE_MASK & COLOR_MASKS[self.current_color]
+                    if reverse_mask:
+                        code = lowest_code(reverse_mask)
                     
                 if self.can_value_change:
                     # Computer Can Value Change, However, Should it?
-                    # Computer Checks to See if Value Change Color is Better Than Current
+                    # Computer Checks to See if Value Change Color is Better Than Current,
+                    # Unless the Next Player Has Shown They Cannot Follow the Current Color
                     current_color_num = self.colors_in_hand[self.current_color]
-                    best_value_change_color = self.get_best_color(self.value_change_cards)
-                    if self.colors_in_hand[best_value_change_color] > current_color_num or len(self.value_change_cards) == len(self.legal_cards):
-                        card = self.get_card_by_color(self.value_change_cards, best_value_change_color)
+                    best_value_change_color = self.get_best_color(self.value_change_mask)
+                    better = self.colors_in_hand[best_value_change_color] > current_color_num
+                    if (better and not match.tracker.is_void(next_turn_id, self.current_color)) or self.value_change_mask == self.legal_mask:
+                        code = self.get_code_by_color(self.value_change_mask, best_value_change_color)
                     
                     
-                if card == None:
+                if code == None:
                     #print("Random Strategy")
-                    card = random.choice(list(set(self.legal_cards) - set(self.value_change_cards)))
+                    code = self.get_random_code(self.legal_mask & ~self.value_change_mask, match.ai_rng)
             
-        color = card.get_color()
-        self.colors_in_hand[color] -= 1
-        return str(self.index_card(card.get_color(), card.get_value()))
+        return str(self.index_code(code))
     
-    def get_wild_color(self):
+    def get_wild_color(self, match):
+        '''Names the most held color. Holding mostly wilds, names a color the next
+        player cannot follow, else the color with the fewest cards still out.'''
+        if self.wild_choice != None:
+            color = Deck.colors[self.wild_choice]
+            self.wild_choice = None
+            return color
         max_key = max(self.colors_in_hand, key=self.colors_in_hand.get)
         if max_key == 'wild':
-            return random.choice(('r','g','b','y'))
+            next_turn_id = match.get_next_turn()
+            for color in Deck.colors:
+                if match.tracker.is_void(next_turn_id, color):
+                    return color
+            return min(Deck.colors, key=lambda color: match.tracker.remaining_color(color, self.hand))
         else:
             return max_key
-        
-    def get_card_by_value(self, card_list, *values):
-        for card in card_list:
-            if card.get_value() in values:
-                return card
-            
-    def get_all_cards_by_value(self, card_list, *values):
-        cards = []
-        for card in card_list:
-            if card.get_value() in values:
-                cards.append(card)
-        return cards
     
-    def get_card_by_color(self, card_list, *colors):
-        for card in card_list:
-            if card.get_color() in colors:
-                return card
+    def solve_endgame(self, match):
+        '''Returns the EndgameSolver's move once the deck is empty and every hand
+        is known, or None if the position holds more than 'endgame_cards' cards
+        or takes the solver too long. Reshuffled piles refill the deck, so those
+        matches have no endgame to solve.'''
+        if len(match.deck) or match.reshuffle or (match.hide_computer_hands and not match.simulation):
+            return None
+        seats = match.turn_list
+        hands = tuple(tuple(sorted(card.code for card in match.players[identity].hand)) for identity in seats)
+        if sum(len(hand) for hand in hands) > self.endgame_cards:
+            return None
+        return match.endgame.best_move(hands, Deck.colors.index(match.current_color), SEARCH_VALUES.index(match.current_value),
+                                       match.seat_index[self.id], -1 if match.reverse else 1, match.passes)
+
+    def choose_action(self, match):
+        '''Returns think()'s answer as a Match.apply() action, for matches
+        driven without next_turn.'''
+        answer = self.think(match)
+        if answer == 'd':
+            return MOVE_DRAW if len(match.deck) > 0 else MOVE_PASS
+        code = self.hand.get_card(int(answer)).code
+        if code < WILD_CODE:
+            return code
+        return SearchState.encode(code, Deck.colors.index(self.get_wild_color(match)))
+
+    def play_move(self, move):
+        '''Returns think()'s answer for a search move, keeping a wild's color for get_wild_color.'''
+        code, color, value = SearchState.decode(move)
+        if code >= WILD_CODE:
+            self.wild_choice = color
+        return str(self.index_code(code))
+
+    def get_code_by_color(self, mask, color):
+        '''Returns the lowest card code in 'mask' with the given color.'''
+        return lowest_code(mask & COLOR_MASKS[color])
+
+    def get_random_code(self, mask, rng=None):
+        '''Returns a card code from 'mask', weighted by the copies held.'''
+        counts = self.hand.counts
+        choice = (rng or random).randrange(sum(counts[code] for code in iter_codes(mask)))
+        for code in iter_codes(mask):
+            choice -= counts[code]
+            if choice < 0:
+                return code
     
-    def get_best_color(self, card_list):
+    def get_best_color(self, mask):
+        '''Returns the color in 'mask' with the most cards in hand.'''
         best_color = None
         best_color_num = 0
-        for card in card_list:
-            color = card.get_color()
-            if self.colors_in_hand[color] > best_color_num:
+        for color in Deck.colors:
+            if mask & COLOR_MASKS[color] and self.colors_in_hand[color] > best_color_num:
                 best_color = color
                 best_color_num = self.colors_in_hand[color]
         return best_color
 
+class DecisionSource:
+    '''Where the lines a human player types come from.
+
+    read() returns the line for one 'kind' of decision: 'turn' (a card number
+    on the page shown, (D)raw, pas(S), '<'/'>' to scroll or (P)ause), 'color'
+    for a wild, 'pause' for the pause screen or 'break' for Press Enter. The
+    line then goes through the same checks as typed input.'''
+
+    def read(self, match, kind, prompt=''):
+        raise NotImplementedError
+
+class StdinSource(DecisionSource):
+    '''Reads the terminal; the echoed line means the next frame is redrawn in full.'''
+
+    def read(self, match, kind, prompt=''):
+        player_input = str(input(prompt))
+        match.renderer.invalidate()
+        return player_input
+
+class ScriptedSource(DecisionSource):
+    '''Plays back 'lines' in order, then defers to 'fallback' (DecisionSource), or
+    raises BadInputError if there is none.'''
+
+    def __init__(self, lines, fallback=None):
+        self.lines = collections.deque(lines)
+        self.fallback = fallback
+
+    def read(self, match, kind, prompt=''):
+        if self.lines:
+            return self.lines.popleft()
+        if self.fallback != None:
+            return self.fallback.read(match, kind, prompt)
+        raise BadInputError('Scripted Decisions Ran Out at a {} Prompt'.format(kind.title()))
+
+class ComputerSource(DecisionSource):
+    '''Types what ComputerPlayer would choose, scrolling the hand to reach a card
+    on a later page, so the human path runs without anyone at the keyboard.'''
+
+    def __init__(self):
+        self.advisor = None                 #    ComputerPlayer thinking with the seat's hand
+        self.pending = collections.deque()   #    Lines left of the current choice
+
+    def get_advisor(self, player):
+        if self.advisor == None or self.advisor.hand is not player.hand:
+            self.advisor = ComputerPlayer(player.get_name())
+            self.advisor.hand = player.hand
+        self.advisor.assign_id(player.get_id())
+        return self.advisor
+
+    def read(self, match, kind, prompt=''):
+        if kind == 'break':
+            return ''
+        elif kind == 'pause':
+            return '1'
+        player = match.players[match.turn]
+        advisor = self.get_advisor(player)
+        if kind == 'color':
+            return advisor.get_wild_color(match)
+        if not self.pending:
+            if player.get_force_draws() > 0 and len(match.deck) > 0:
+                answer = 'd'
+            else:
+                answer = advisor.think(match)
+            if answer == 'd':
+                self.pending.append('d' if len(match.deck) > 0 else 's')
+            else:
+                page, position = divmod(int(answer), 10)
+                self.pending.extend('>' * ((page - match.hand_position) % (player.maxScroll + 1)))
+                self.pending.append(str(position))
+        return self.pending.popleft()
+
 class Card:
     '''
     'suit' (string) : Card's Color (rgby)
@@ -546,6 +860,8 @@ class Card:
         '+2':'+','R':'R','W':'W','+4':'$','X':'X'
     }
 
+    value_names = {'X':'Skip', 'R':'Reverse', '+2':'Draw Two', 'W':'Wild', '+4':'Wild Draw Four'}
+
     big_nums = {
         "0" : [" .d888b. ","d88P Y88b","888   888","888   888","888   888","888   888","d88P Y88b"," \"Y888P\" "],
         "1" : ["  d888   "," d8888   ","   888   ","   888   ","   888   ","   888   ","   888   "," 8888888 "],
@@ -578,7 +894,8 @@ class Card:
         '''Initializes Uno Card w/ Color and Value.'''
         self.wild = False       #Is wild card?
         self.zero = False
-        self.card_id = '{}{}'.format(self.id_map[color],self.id_map[value])
+        self.card_id = self.id_map[color]+self.id_map[value]
+        self.code = CARD_CODES[self.card_id]
         self.set_color(color)
         self.set_value(value)
         self.set_points(value)
@@ -586,23 +903,42 @@ class Card:
 
     #############################################
 
+    @classmethod
+    def from_code(cls, code):
+        '''Returns a new Card for a card code.'''
+        return cls(*CARD_FACES[code])
+
     ### -\/-  Retrieve Card Information  -\/- ### 
     
     def __repr__(self):
         return "{},{}".format(self.color, self.value)
 
+    def describe(self):
+        '''Returns the card in plain words, such as 'Red 7' or 'Wild Draw Four'.'''
+        name = self.value_names.get(self.value, self.value)
+        if self.wild:
+            return name
+        return '{} {}'.format(self.color.title(), name)
+
     def get_big_num(self, reverse, reverse_seed=0):
-        '''Returns list of strings to draw card's value on the pile.'''
-        big_nums = []
-        color_code = self.color_code
-        color_code_dark = self.color_code_dark
+        '''Returns list of strings to draw card's value on the pile.
+
+        Lists come from the shared render cache and must not be modified.'''
         value = self.value
         if value == 'R':
             if not reverse:
                 value += str(reverse_seed)
             else:
                 value += str(9-reverse_seed)
-        for mid in self.big_nums[value]:
+        return BIG_NUM_FRAMES[(self.color, value)]
+
+    @classmethod
+    def build_big_num(cls, color, value):
+        '''Formats the pile lines for a color and big_nums key, see BIG_NUM_FRAMES.'''
+        big_nums = []
+        color_code = cls.colors[color]
+        color_code_dark = cls.colors['d'+color]
+        for mid in cls.big_nums[value]:
             big_nums += ['{}| |{}'.format(color_code,color_code_dark)+mid+'{}| |\033[0m\t'.format(color_code)]
             
         return big_nums
@@ -624,6 +960,12 @@ class Card:
         return self.points
     
     def get_row(self, row_num,hide=False):
+        if hide:
+            return HIDDEN_ROWS[row_num]
+        return CARD_ROWS[self.code][row_num]
+
+    def build_row(self, row_num,hide=False):
+        '''Formats one of the four rows of the card's hand icon, see CARD_ROWS.'''
         value = self.value
         display_space = self.display_space
         if hide:
@@ -715,6 +1057,406 @@ class Card:
     def is_zero(self):
         return self.zero
     
+### Card Codes ###
+#   Each distinct card (by Card.card_id) maps to a small integer: colored cards
+#   are color*13+value in Deck order, followed by the two wilds.
+CARD_FACES = tuple((color, value) for color in Deck.colors for value in Deck.values) + (('wild','W'), ('wild','+4'))
+CARD_KINDS = tuple(Card.id_map[color]+Card.id_map[value] for color, value in CARD_FACES)
+CARD_CODES = {card_id : code for code, card_id in enumerate(CARD_KINDS)}
+CARD_COPIES = tuple(4 if color == 'wild' else 1 if value == '0' else 2 for color, value in CARD_FACES)     #    Copies in a full deck
+
+### Render Cache ###
+#   Every hand icon row and pile frame, formatted once at import.
+CARD_ROWS = tuple(tuple(Card(color, value).build_row(row) for row in range(4)) for color, value in CARD_FACES)
+HIDDEN_ROWS = tuple(Card(*CARD_FACES[0]).build_row(row, True) for row in range(4))
+BIG_NUM_FRAMES = {(color, value) : Card.build_big_num(color, value)
+                  for color in Deck.colors + ('wild',) for value in Card.big_nums}
+
+### Legality Tables (bitmasks over card codes) ###
+def _code_mask(include):
+    mask = 0
+    for code, (color, value) in enumerate(CARD_FACES):
+        if include(color, value):
+            mask |= 1 << code
+    return mask
+
+COLORED_MASK = _code_mask(lambda color, value: color != 'wild')
+COLOR_MASKS = {color : _code_mask(lambda c, v: c == color) for color in Deck.colors + ('wild',)}
+VALUE_MASKS = {value : _code_mask(lambda c, v: c != 'wild' and v == value) for value in Deck.values + ('W','+4')}
+WILD_MASK = _code_mask(lambda color, value: value == 'W')
+DRAW_FOUR_MASK = _code_mask(lambda color, value: value == '+4')
+ZERO_MASK = VALUE_MASKS['0']
+SKIP_MASK = VALUE_MASKS['X']
+REVERSE_MASK = VALUE_MASKS['R']
+DRAW_TWO_MASK = VALUE_MASKS['+2']
+VALUE_CODES = {value : tuple(code for code, face in enumerate(CARD_FACES) if face[1] == value) for value in Deck.values + ('W','+4')}
+WILD_CODE = CARD_CODES['WW']
+DRAW_FOUR_CODE = CARD_CODES['W$']
+LEGAL_MASKS = {(color, value) : (COLOR_MASKS[color] | VALUE_MASKS[value]) & COLORED_MASK
+               for color in COLOR_MASKS for value in VALUE_MASKS}
+
+def lowest_code(mask):
+    '''Returns the smallest card code set in 'mask'.'''
+    return (mask & -mask).bit_length() - 1
+
+def iter_codes(mask):
+    '''Yields the card codes set in 'mask', smallest first.'''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class ScreenRenderer:
+    '''Draws frames by rewriting only the character cells that changed since the last frame.
+
+    Frames are parsed into rows of (style, character) cells, expanding tabs.
+    The game only uses single SGR color codes, so a cell's style is the last
+    escape seen since a reset. Everything is sent in one buffered write.'''
+
+    tab_size = 8
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.previous = None                #    Rows of (Style, Char) cells last drawn
+
+    def invalidate(self):
+        '''Forces a full redraw, for when something else wrote to the terminal.'''
+        self.previous = None
+
+    def parse(self, frame):
+        rows = []
+        row = []
+        style = ''
+        i = 0
+        length = len(frame)
+        while i < length:
+            char = frame[i]
+            if char == '\033' and frame.startswith('[', i+1):
+                end = i+2
+                while end < length and not frame[end].isalpha():
+                    end += 1
+                sequence = frame[i:end+1]
+                if sequence in ('\033[0m', '\033[m'):
+                    style = ''
+                elif sequence.endswith('m'):
+                    style = sequence
+                i = end+1
+                continue
+            if char == '\n':
+                rows.append(row)
+                row = []
+            elif char == '\t':
+                row.extend([(style, ' ')]*(self.tab_size - len(row) % self.tab_size))
+            else:
+                row.append((style, char))
+            i += 1
+        rows.append(row)
+        return rows
+
+    def render(self, frame):
+        '''Returns the escape output turning the previous frame into 'frame'.'''
+        rows = self.parse(frame)
+        previous = self.previous
+        output = []
+        if previous == None:
+            output.append('\033[H\033[2J')
+            previous = []
+        for y, row in enumerate(rows):
+            old = previous[y] if y < len(previous) else []
+            if row == old:
+                continue
+            x = 0
+            while x < len(row):
+                if x < len(old) and row[x] == old[x]:
+                    x += 1
+                    continue
+                output.append('\033[{};{}H'.format(y+1, x+1))
+                style = None
+                while x < len(row) and (x >= len(old) or row[x] != old[x]):
+                    if row[x][0] != style:
+                        style = row[x][0]
+                        output.append('\033[0m'+style)
+                    output.append(row[x][1])
+                    x += 1
+            if len(old) > len(row):
+                output.append('\033[{};{}H\033[0m\033[K'.format(y+1, len(row)+1))
+        output.append('\033[0m\033[{};1H\033[J'.format(len(rows)+1))
+        self.previous = rows
+        return ''.join(output)
+
+    def draw(self, frame):
+        stream = self.stream or sys.stdout
+        stream.write(self.render(frame))
+        stream.flush()
+
+class AnimationScheduler:
+    '''Plays animation steps within a wall-clock budget.
+
+    Each step gets a share of the budget proportional to its weight. Steps
+    always run, but a frame is only drawn while the animation is on schedule
+    and no faster than 'fps'; the final frame is always drawn. Any keypress
+    skips straight to the final frame.'''
+
+    def __init__(self, fps=30, stream=None):
+        self.fps = fps
+        self.stream = stream
+
+    def run(self, steps, budget, render):
+        if not steps:
+            return
+        stream = self.stream or sys.stdin
+        total_weight = sum(weight for weight, step in steps) or 1
+        frame_time = 1.0 / self.fps
+        start = time.monotonic()
+        last_frame = None
+        elapsed_weight = 0
+        fast_forward = False
+        with self.key_listener(stream) as key_pressed:
+            for index, (weight, step) in enumerate(steps):
+                frame_args = step()
+                last = index == len(steps) - 1
+                if fast_forward:
+                    if last:
+                        render(frame_args)
+                    continue
+                elapsed_weight += weight
+                deadline = start + budget * elapsed_weight / total_weight
+                now = time.monotonic()
+                if last or (now < deadline and (last_frame == None or now - last_frame >= frame_time)):
+                    render(frame_args)
+                    last_frame = time.monotonic()
+                remaining = deadline - time.monotonic()
+                if remaining > 0 and key_pressed(remaining):
+                    fast_forward = True
+
+    def key_listener(self, stream):
+        '''Returns a context manager yielding key_pressed(timeout), which waits and reports a keypress.'''
+
+        @contextlib.contextmanager
+        def sleeper():
+            def key_pressed(timeout):
+                time.sleep(timeout)
+                return False
+            yield key_pressed
+
+        try:
+            interactive = stream.isatty()
+        except (AttributeError, ValueError):
+            interactive = False
+        if not interactive:
+            return sleeper()
+        if os.name == 'nt':
+            import msvcrt
+
+            @contextlib.contextmanager
+            def console():
+                def key_pressed(timeout):
+                    end = time.monotonic() + timeout
+                    while time.monotonic() < end:
+                        if msvcrt.kbhit():
+                            while msvcrt.kbhit():
+                                msvcrt.getwch()
+                            return True
+                        time.sleep(0.01)
+                    return False
+                yield key_pressed
+            return console()
+        try:
+            import termios
+            import tty
+        except ImportError:
+            return sleeper()
+
+        @contextlib.contextmanager
+        def terminal():
+            fd = stream.fileno()
+            attributes = termios.tcgetattr(fd)
+            def key_pressed(timeout):
+                readable = select.select([fd], [], [], timeout)[0]
+                if readable:
+                    os.read(fd, 1024)
+                    return True
+                return False
+            try:
+                tty.setcbreak(fd)
+                yield key_pressed
+            finally:
+                termios.tcsetattr(fd, termios.TCSADRAIN, attributes)
+        return terminal()
+
+class MatchView:
+    '''Screen elements for a Match, rebuilt from the match state only when drawn.
+
+    The engine marks fields dirty as the state changes; refresh() formats just
+    the dirty ones before a frame is drawn, so headless matches never format.'''
+
+    def __init__(self, match):
+        self.match = match
+        self.elements = dict(Match.elements_init)
+        for player_id in match.players:
+            seat = player_id[4:]
+            self.elements.setdefault('P{}Name'.format(seat), ' '*11)
+            self.elements.setdefault('P{}Cards'.format(seat), ' '*11)
+            self.elements.setdefault('P{}Turn'.format(seat), '')
+            self.elements.setdefault('P{}Count'.format(seat), '   ')
+        self.messages = {'Console':('', ()), 'Error':('', ())}
+        self.hand_titles = {}
+        self.dirty = {'names', 'deck', 'pile', 'turns', 'hand', 'Console', 'Error'}
+        self.dirty_cards = set(match.players)
+
+    def mark(self, field):
+        self.dirty.add(field)
+
+    def mark_cards(self, player_id):
+        self.dirty_cards.add(player_id)
+
+    def set_message(self, key, template, args):
+        self.messages[key] = (template, args)
+        self.dirty.add(key)
+
+    def get_hand_title(self, player_id):
+        if player_id not in self.hand_titles:
+            player_name = self.match.players[player_id].get_name()
+            if len(player_name) < 9:
+                self.hand_titles[player_id] = "{}'s Hand\t".format(player_name)
+            else:
+                self.hand_titles[player_id] = "{}'s Hand".format(player_name)
+        return self.hand_titles[player_id]
+
+    def refresh(self):
+        '''Formats the dirty elements and returns the elements dict.'''
+        match = self.match
+        elements = self.elements
+        dirty = self.dirty
+        if not dirty and not self.dirty_cards:
+            return elements
+
+        for player_id in self.dirty_cards:
+            card_num = str(match.players[player_id].get_card_num())
+            elements['P{}Cards'.format(player_id[4:])] = '  '+(' '*(3-len(card_num)))+card_num+' Cards'
+            elements['P{}Count'.format(player_id[4:])] = (' '*(3-len(card_num)))+card_num
+        self.dirty_cards.clear()
+
+        if 'names' in dirty:
+            for player_id in match.players:
+                name = match.players[player_id].get_name()
+                elements['P{}Name'.format(player_id[4:])] = name+(' '*(11-len(name)))
+
+        if 'turns' in dirty:
+            for player_id in match.players:
+                elements['P{}Turn'.format(player_id[4:])] = ''
+            if match.highlight_id:
+                elements['P{}Turn'.format(match.highlight_id[4:])] = match.highlight_color
+
+        if 'deck' in dirty:
+            deck_num = len(match.deck)
+            bar = int(math.ceil(deck_num/(12*match.decks)))
+            elements['DNum'] = deck_num
+            elements['PostDNum'] = '\t' if len(str(deck_num)) < 2 else ''
+            elements['Deck'] = [' ']*(9-bar) + ['=']*bar
+
+        if 'pile' in dirty and len(match.pile) > 0:
+            card = match.pile[0]
+            elements['oHeader'] = '{}\u2666\u2666\u2666=========\u2666\u2666\u2666\033[0m\t'.format(card.get_color_code())
+            if match.reverse_frame == None:
+                elements['oMiddle'] = card.get_big_num(match.reverse)
+            else:
+                elements['oMiddle'] = card.get_big_num(match.reverse, match.reverse_frame)
+            if len(match.pile) > 1:
+                previous_card_color = match.pile[1].get_color_code()
+                elements['uHeader'] = '{}      \u2666\u2666\u2666=========\u2666\u2666\u2666\033[0m\t\t'.format(previous_card_color)
+                elements['uMiddle'] = '{}| |\033[0m'.format(previous_card_color)
+                elements['uLower'] = '{}\u2666\u2666\u2666\033[0m'.format(previous_card_color)
+
+        if 'hand' in dirty:
+            if match.hand_title_id:
+                elements['HName'] = self.get_hand_title(match.hand_title_id)
+            if match.hand_visual_id:
+                string = '['
+                for i in range(match.players[match.hand_visual_id].maxScroll+1):
+                    if i == match.hand_position:
+                        string += '|'
+                    else:
+                        string += '-'
+                string += ']'
+                elements['HVisual'] = string
+
+        for key in ('Console', 'Error'):
+            if key in dirty:
+                template, args = self.messages[key]
+                elements[key] = template.format(*args) if args else template
+
+        dirty.clear()
+        return elements
+
+class CardTracker:
+    '''Public knowledge of a match's cards, updated one event at a time.
+
+    Counts the cards not yet seen on the pile by code, color and value, and
+    the colors each player has shown they cannot follow by drawing on their
+    turn, for a shoe of 'decks' decks. Every update and query takes constant time.'''
+
+    def __init__(self, player_ids, decks=1):
+        self.unseen = [copies*decks for copies in CARD_COPIES]
+        self.unseen_colors = dict.fromkeys(Deck.colors + ('wild',), 0)
+        self.unseen_values = dict.fromkeys(Deck.values + ('W','+4'), 0)
+        for code, (color, value) in enumerate(CARD_FACES):
+            self.unseen_colors[color] += self.unseen[code]
+            self.unseen_values[value] += self.unseen[code]
+        self.voids = {identity : set() for identity in player_ids}      #    ID : Colors they cannot follow
+
+    def place(self, card, player_id=None):
+        '''Counts a card put on the pile by 'player_id', or turned from the deck when None.'''
+        color, value = CARD_FACES[card.code]
+        self.unseen[card.code] -= 1
+        self.unseen_colors[color] -= 1
+        self.unseen_values[value] -= 1
+        if player_id != None:
+            self.voids[player_id].discard(color)
+
+    def unplace(self, card):
+        '''Takes back place(); voids are restored by the caller.'''
+        color, value = CARD_FACES[card.code]
+        self.unseen[card.code] += 1
+        self.unseen_colors[color] += 1
+        self.unseen_values[value] += 1
+
+    def draw(self, player_id, color, void=False):
+        '''Notes 'player_id' drawing while 'color' is current.
+
+        'void' is set when the draw shows the player cannot follow 'color', as
+        when they had nothing to play. The cards drawn are unseen, so colors
+        they could not follow before may be held now.'''
+        voids = self.voids[player_id]
+        voids.clear()
+        if void and color in Deck.colors:
+            voids.add(color)
+
+    def change_color(self, player_id, color, forced=False):
+        '''Notes a wild turned to 'color'; a player who names a color is taken to hold it.'''
+        if not forced:
+            self.voids[player_id].discard(color)
+
+    def is_void(self, player_id, color):
+        return color in self.voids[player_id]
+
+    def remaining_color(self, color, hand):
+        '''Returns how many cards of 'color' are neither on the pile nor in 'hand'.'''
+        return self.unseen_colors[color] - hand.color_counts[color]
+
+    def remaining_value(self, value, hand):
+        '''Returns how many cards of 'value' are neither on the pile nor in 'hand'.'''
+        held = 0
+        for code in VALUE_CODES[value]:
+            held += hand.counts[code]
+        return self.unseen_values[value] - held
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    '''Loads Match snapshots, which hold builtin values only; any class is refused.'''
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError('Saved Match Refers to {}.{}'.format(module, name))
+
 class Match:
 
     elements_init = {
@@ -736,24 +1478,47 @@ class Match:
         }
     
     speeds = {'slow':2,'normal':1,'fast':0}
+    log_header = '<BQBB'                # Version, seed, players, rule flags (bit 0 zero change, bit 1 reshuffle)
+    snapshot_magic = b'UNO\x01'          # Leads save_snapshot() files, the last byte is the version
+    snapshot_settings = ('display_effects', 'hide_computer_hands', 'zero_change', 'reshuffle_pile', 'computer_simulation',
+                         'computer_speed', 'computer_think_time', 'animation_fps', 'animation_budgets')
+    snapshot_fields = ('turn', 'reverse', 'current_color', 'current_value', 'draw_amount', 'passes', 'event',
+                       'forced_wild', 'match_complete', 'winner_id', 'opening')
         
 
-    def __init__(self, gs):
+    def __init__(self, gs, seed=None):
+        ### Randomness, all from 'seed' ###
+        if seed == None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.rng = random.Random(seed)                  # Deck, first turn, forced wilds
+        self.ai_rng = random.Random(self.rng.getrandbits(64))     # Computer players' choices
+        self.log = bytearray()                          # One byte per action, see export_log
+        self.opening = 0                                # Log bytes before the first action, 1 naming a wild first card's color
+        self.snapshot_path = None                       # Save file written or resumed from, see discard_snapshot
+
         ### Decks ###
-        self.deck = Deck(True)
-        self.pile = Deck(False)
+        self.decks = Deck.shoe_size(len(gs.players))    # 108 card decks in the shoe
+        self.deck = Deck(True, self.rng, self.decks)
+        self.pile = Pile()
         
         ### Player Information ###
+        self.settings = gs
         self.players = gs.players
         self.turn_list = []
-        self.hand_titles =  {'play1':'','play2':'','play3':'','play4':''}
+        self.seat_index = {}                # ID : Position in turn_list, for get_next_turn
         
         ### Carry Information ###
         self.display_effects = gs.display_effects
         self.hide_computer_hands = gs.hide_computer_hands
         self.zero_change = gs.zero_change
+        self.reshuffle = gs.reshuffle_pile
         self.computer_speed = self.speeds[gs.computer_speed]
         self.simulation = gs.computer_simulation
+        self.source = gs.decision_source or StdinSource()     # Breaks, and humans without a source of their own
+        self.renderer = ScreenRenderer()
+        self.animator = AnimationScheduler(gs.animation_fps)
+        self.animation_budgets = gs.animation_budgets
 
         ### Data ###
         self.hand_position = 0               # For hand displays
@@ -771,50 +1536,54 @@ class Match:
         self.match_complete = False          # Is the Game over?
         self.match_abort = False             # Did the match conclude without a winner?
         self.forced_wild = False             # Force change wild
+        self.journal = []                   # Undo frames of apply(), see undo()
+        self.moves = None                   # Card moves of the apply() in progress
 
-        ### Initialize Names / Cards / Deck (Assuming New Game) ###
-        self.elements = dict(self.elements_init)
-        
-        key_string_name = 'P{}Name'
-        key_string_cards = 'P{}Cards'
-        
-        for i in self.players:
-            self.elements[key_string_name.format(i[-1])] = self.players[i].get_name()+(' '*(11-len(self.players[i].get_name())))
-            self.elements[key_string_cards.format(i[-1])] = '  '+(' '*(3-len(str(self.players[i].get_card_num()))))+str(self.players[i].get_card_num())+' Cards'
-            
-        self.elements['DNum'] = len(self.deck)
-        
-        if len(str(len(self.deck))) < 2:
-            self.elements['PostDNum'] = '\t'
-            
-        j = 8
-        for i in range(int(math.ceil(len(self.deck)/12))):
-            self.elements['Deck'][j] = '='
-            j -= 1
+        ### View (formatted lazily, only for frames actually drawn) ###
+        self.highlight_id = ''              # Player whose tile is highlighted
+        self.highlight_color = ''
+        self.hand_title_id = ''              # Player named above the hand
+        self.hand_visual_id = ''             # Player whose scroll bar is shown
+        self.reverse_frame = None            # Reverse animation frame shown on the pile
+        self.view = MatchView(self)
                     
         for key in GameSettings.player_identities:
-            try:
-                self.build_hand_string(key)
+            if key in self.players:
+                self.seat_index[key] = len(self.turn_list)
                 self.turn_list += [key]
-            except KeyError:
-                pass
             
         self.pass_max = len(self.turn_list)
+        self.tracker = CardTracker(self.turn_list, self.decks)
+        self.endgame = EndgameSolver(self.zero_change)
             
     def clear_shell(self):
         os.system('cls' if os.name == 'nt' else 'clear')
+        self.renderer.invalidate()
+
+    def show_screen(self, hide=False, wild_seed=0):
+        '''Draws the game screen, skipped entirely in simulations.'''
+        if not self.simulation:
+            self.renderer.draw(self.draw_screen(hide, wild_seed))
+
+    def read_input(self, prompt='', kind='break'):
+        '''Reads the line typed for a 'kind' of decision, see DecisionSource, from
+        the source of the player on turn or else the match's own.'''
+        player = self.players.get(self.turn)
+        if player != None and player.source != None:
+            return player.source.read(self, kind, prompt)
+        return self.source.read(self, kind, prompt)
 
     def begin(self):
-        self.elements['Console'] = 'Beginning Game, Press Enter.'
-        print(self.draw_screen())
+        self.set_message('Console', 'Beginning Game, Press Enter.')
+        self.show_screen()
         self.enter_break()
         self.event_deal_cards()
-        self.turn = random.choice(self.turn_list)
-        self.elements['Console'] = 'First turn will be {}. Press Enter.'.format(self.players[self.turn].get_name())
-        print(self.draw_screen(True))
+        self.turn = self.rng.choice(self.turn_list)
+        self.set_message('Console', 'First turn will be {}. Press Enter.', self.players[self.turn].get_name())
+        self.show_screen(True)
         self.enter_break()
         self.place_card()
-        self.elements['P{}Turn'.format(self.turn[-1])] = '\033[93m'
+        self.set_highlight(self.turn, '\033[93m')
         if self.event == 'wild':
             self.event_wild_card()
         elif self.event == 'reverse':
@@ -822,37 +1591,22 @@ class Match:
             
     def end(self, gs):
         if not self.match_abort:
-            points = 0
-            self.elements['P{}Turn'.format(self.turn[-1])] = ''
-            self.elements['Console'] = '{} Wins! Press Enter to Begin Point Tally'.format(self.players[self.winner_id].get_name())
-            print(self.draw_screen())
+            self.set_highlight(self.turn, '')
+            self.set_message('Console', '{} Wins! Press Enter to Begin Point Tally', self.players[self.winner_id].get_name())
+            self.show_screen()
             self.enter_break()
             
+            tally = {'points':0}
+            steps = []
             for identity in self.turn_list:
                 if identity != self.winner_id:
-                    self.turn = identity
-                    self.elements['HName'] = self.hand_titles[self.turn]
-                    self.elements['P{}Turn'.format(self.turn[-1])] = '\033[93m'
-                    while self.players[identity].get_card_num() > 0:
-                        card = self.players[identity].remove_card(0)
-                        points += card.get_points()
-                        self.elements['Console'] = '{} Won {} Points!'.format(self.players[self.winner_id].get_name(),points)
-                        
-                        key_string_cards = 'P{}Cards'
-                        self.elements[key_string_cards.format(identity[-1])] = '  '+(' '*(3-len(str(self.players[identity].get_card_num()))))+str(self.players[identity].get_card_num())+' Cards'
-                        self.players[identity].maxScroll = math.ceil((self.players[identity].get_card_num() / 10)-1)
-                        if self.hand_position > self.players[identity].maxScroll:
-                            self.hand_position -= 1
-                        self.build_hand_visual(identity)
-                        
-                        if self.display_effects and not self.simulation:
-                            print(self.draw_screen())
-                            time.sleep(.1)
-                    self.elements['P{}Turn'.format(self.turn[-1])] = ''
+                    steps += self.tally_steps(identity, tally)
+            self.animate(steps, 'tally')
+            points = tally['points']
                         
             self.players[self.winner_id].add_points(points)
-            self.elements['Console'] = '{} Won {} Points! Press Enter'.format(self.players[self.winner_id].get_name(),points)
-            print(self.draw_screen())
+            self.set_message('Console', '{} Won {} Points! Press Enter', self.players[self.winner_id].get_name(), points)
+            self.show_screen()
             self.enter_break()
         
         gs.clear_staging()
@@ -861,30 +1615,70 @@ class Match:
             gs.add_player(self.players[identity])
         return gs
         
+    def winner_points(self):
+        '''Returns the points end() awards the winner: every card left in the other hands.'''
+        points = 0
+        for identity in self.turn_list:
+            for card in self.players[identity].hand:
+                points += card.get_points()
+        return points
+
+    def tally_steps(self, identity, tally):
+        '''Returns animation steps moving 'identity's cards into the winner's points.'''
+        def begin_hand():
+            self.turn = identity
+            self.set_hand_title(self.turn)
+            self.set_highlight(self.turn, '\033[93m')
+
+        def count_card(last):
+            card = self.players[identity].remove_card(0)
+            tally['points'] += card.get_points()
+            self.set_message('Console', '{} Won {} Points!', self.players[self.winner_id].get_name(), tally['points'])
+            self.adjust_card_amount(identity)
+            if last:
+                self.set_highlight(identity, '')
+
+        count = self.players[identity].get_card_num()
+        steps = [(0, begin_hand)]
+        for i in range(count):
+            steps.append((1, lambda last=(i == count-1): count_card(last)))
+        return steps
+
+    def animate(self, steps, name, hide=False):
+        '''Runs (weight, step) animation steps, drawing frames only when effects are shown.
+
+        A step may return draw_screen keyword arguments for its frame.'''
+        if self.display_effects and not self.simulation:
+            render = lambda frame_args=None: self.show_screen(**(frame_args or {'hide':hide}))
+            self.animator.run(steps, self.animation_budgets[name], render)
+        else:
+            for weight, step in steps:
+                weight #unused
+                step()
+
     def adjust_card_amount(self, player_id):
-        key_string_cards = 'P{}Cards'
-        self.elements[key_string_cards.format(player_id[-1])] = '  '+(' '*(3-len(str(self.players[player_id].get_card_num()))))+str(self.players[player_id].get_card_num())+' Cards'
+        self.view.mark_cards(player_id)
         self.players[player_id].maxScroll = math.ceil((self.players[player_id].get_card_num() / 10)-1)
         if self.hand_position > self.players[player_id].maxScroll:
             self.hand_position -= 1
         self.build_hand_visual(player_id)
 
-    def build_hand_string(self, player_id):
-        player_name = self.players[player_id].get_name()
-        if len(player_name) < 9:
-            self.hand_titles[player_id] = "{}'s Hand\t".format(self.players[player_id].get_name())
-        else:
-            self.hand_titles[player_id] = "{}'s Hand".format(self.players[player_id].get_name())
-
     def build_hand_visual(self, player_id):
-        string = '['
-        for i in range(self.players[player_id].maxScroll+1):
-            if i == self.hand_position:
-                string += '|'
-            else:
-                string += '-'
-        string += ']'
-        self.elements['HVisual'] = string
+        self.hand_visual_id = player_id
+        self.view.mark('hand')
+
+    def set_hand_title(self, player_id):
+        self.hand_title_id = player_id
+        self.view.mark('hand')
+
+    def set_highlight(self, player_id, color):
+        self.highlight_id = player_id
+        self.highlight_color = color
+        self.view.mark('turns')
+
+    def set_message(self, key, template, *args):
+        '''Sets the 'Console' or 'Error' line; formatting waits until a frame is drawn.'''
+        self.view.set_message(key, template, args)
 
     def check_input(self, player_input):
         if player_input == '':
@@ -893,14 +1687,14 @@ class Match:
             if int(player_input)+(10*self.hand_position) < self.players[self.turn].get_card_num():
                 return {'valid':True,'entry':str(int(player_input)+(10*self.hand_position)),'type':'card'}
             else:
-                self.elements['Error'] = '{} is not a card.'.format(player_input)
+                self.set_message('Error', '{} is not a card.', player_input)
                 return {'valid':False,'entry':player_input}
         else:
             player_input = player_input.lower()[0]
             if player_input in ['<','>','u','d','p','q','s']:
                 return {'valid':True,'entry':player_input}
             else:
-                self.elements['Error'] = '{} is not a valid selection.'.format(player_input)
+                self.set_message('Error', '{} is not a valid selection.', player_input)
                 return {'valid':False,'entry':player_input}
 
     def check_color_input(self, player_input):
@@ -919,51 +1713,47 @@ class Match:
 
     def event_deal_cards(self):
         if self.display_effects and not self.simulation:
-            self.elements['Console'] = 'Dealing Cards...'
-        for i in ('play1','play2','play3','play4'):
-            if i in self.players:
-                for j in range(7):
-                    j #unused
-                    self.deal_card(i)
-                    if self.display_effects and not self.simulation:
-                        print(self.draw_screen(True))
-                        time.sleep(.1)
+            self.set_message('Console', 'Dealing Cards...')
+        steps = []
+        for i in self.turn_list:
+            for j in range(7):
+                j #unused
+                steps.append((1, lambda i=i: self.deal_card(i)))
+        self.animate(steps, 'deal', True)
 
     def event_reverse(self):
+        hide = False
+        if self.players[self.turn].get_type() == "Computer":
+            hide = self.hide_computer_hands
+        def announce():
+            self.set_message('Console', "Reverse Card Played! Reversing Turn Order.")
+        def spin(i):
+            self.reverse_frame = i
+            self.view.mark('pile')
         if self.display_effects and not self.simulation:
-            hide = False
-            if self.players[self.turn].get_type() == "Computer":
-                hide = self.hide_computer_hands
-            self.elements['Console'] = "Reverse Card Played! Reversing Turn Order.".format(self.players[self.turn].get_name())
-            print(self.draw_screen(hide))
-            time.sleep(1)
+            steps = [(10, announce)]
             for i in range(10):
-                card_big_nums = self.pile[0].get_big_num(self.reverse,i)
-                self.elements['oMiddle'] = card_big_nums
-                print(self.draw_screen(hide))
-                if self.display_effects and not self.simulation:
-                    time.sleep(.1)
-        card_big_nums = self.pile[0].get_big_num(self.reverse,9)
-        self.elements['oMiddle'] = card_big_nums
+                steps.append((1, lambda i=i: spin(i)))
+            self.animate(steps, 'reverse', hide)
+        self.reverse_frame = None
         self.reverse = not self.reverse
+        self.view.mark('pile')
         self.event = ''
             
     def event_skip(self):
+        hide = False
+        if self.players[self.turn].get_type() == "Computer":
+            hide = self.hide_computer_hands
+        def announce():
+            self.set_message('Console', "Skip Card Placed! Skipping {}'s Turn.", self.players[self.turn].get_name())
+        def blink(color):
+            self.set_highlight(self.turn, color)
         if self.display_effects and not self.simulation:
-            hide = False
-            if self.players[self.turn].get_type() == "Computer":
-                hide = self.hide_computer_hands
-            self.elements['Console'] = "Skip Card Placed! Skipping {}'s Turn.".format(self.players[self.turn].get_name())
-            print(self.draw_screen(hide))
-            time.sleep(1)
+            steps = [(10, announce)]
             for i in range(2):
                 i #unused
-                self.elements['P{}Turn'.format(self.turn[-1])] = '\033[91m'
-                print(self.draw_screen(hide))
-                time.sleep(.3)
-                self.elements['P{}Turn'.format(self.turn[-1])] = ''
-                print(self.draw_screen(hide))
-                time.sleep(.3)
+                steps += [(3, lambda: blink('\033[91m')), (3, lambda: blink(''))]
+            self.animate(steps, 'skip', hide)
         self.turn_complete = True
         self.event = ''
 
@@ -971,10 +1761,10 @@ class Match:
         hide = False
         if not self.forced_wild:
             if self.players[self.turn].get_type() == 'Human':
-                self.elements['Console'] = 'Wild Card! Specifiy a Color: (B)lue, (R)ed, (G)reen, (Y)ellow'
-                self.elements['Error'] = 'Specifiy A Color'
-                print(self.draw_screen())
-                player_input = str(input("Color Change: "))
+                self.set_message('Console', 'Wild Card! Specifiy a Color: (B)lue, (R)ed, (G)reen, (Y)ellow')
+                self.set_message('Error', 'Specifiy A Color')
+                self.show_screen()
+                player_input = self.read_input("Color Change: ", 'color')
                 checked = self.check_color_input(player_input)
                 while not checked['valid']:
                     if checked['entry'] == '<':
@@ -987,33 +1777,30 @@ class Match:
                         if self.hand_position > self.players[self.turn].maxScroll:
                             self.hand_position = 0
                         self.build_hand_visual(self.turn)
-                    print(self.draw_screen())
-                    player_input = str(input("Color Change: "))
+                    self.show_screen()
+                    player_input = self.read_input("Color Change: ", 'color')
                     checked = self.check_color_input(player_input)
             else:
                 hide = self.hide_computer_hands
-                checked = self.check_color_input(self.players[self.turn].get_wild_color())
+                checked = self.check_color_input(self.players[self.turn].get_wild_color(self))
             self.wild_color_change = checked['entry']
+            self.tracker.change_color(self.turn, self.wild_color_change)
+            self.record_color(self.wild_color_change)
         else:
-            self.wild_color_change = self.check_color_input(random.choice(('r','b','g','y')))['entry']
+            self.wild_color_change = self.check_color_input(self.rng.choice(('r','b','g','y')))['entry']
+            self.tracker.change_color(self.turn, self.wild_color_change, True)
             self.forced_wild = False
         self.current_color = self.wild_color_change
-        self.elements['Error'] = ""
+        self.set_message('Error', "")
         if self.display_effects and not self.simulation:
-            self.elements['Console'] = 'Wild Card! Changing Color.'
-            seed = 1
+            self.set_message('Console', 'Wild Card! Changing Color.')
+            steps = []
             for i in range(10):
-                i #unused
-                if seed > 4:
-                    seed = 1
-                print(self.draw_screen(hide,wild_seed=seed))
-                time.sleep(.1)
-                seed += 1
+                steps.append((1, lambda seed=i % 4 + 1: {'hide':hide, 'wild_seed':seed}))
+            self.animate(steps, 'wild', hide)
         self.pile[0].change_color(self.wild_color_change)
         self.wild_color_change = ''
-        card_big_nums = self.pile[0].get_big_num(self.reverse)
-        self.elements['oHeader'] = '{}\u2666\u2666\u2666=========\u2666\u2666\u2666\033[0m\t'.format(self.pile[0].get_color_code())
-        self.elements['oMiddle'] = card_big_nums
+        self.view.mark('pile')
         self.event = ''
         
     def event_draw(self):
@@ -1024,50 +1811,54 @@ class Match:
     def deal_card(self, player_id):
         
         card = self.deck.draw()
+        forced = self.players[player_id].get_force_draws() > 0
+        if self.turn != '':
+            self.tracker.draw(player_id, self.current_color, not forced and not self.can_play(player_id))
         self.players[player_id].add_card(card)
+        if not forced and self.turn != '':
+            self.log.append(MOVE_DRAW)
+        if self.moves != None:
+            self.moves.append(('draw', player_id))
         
         ### Adjust Hand Visual ###
         self.players[player_id].maxScroll = math.ceil((self.players[player_id].get_card_num() / 10)-1)
         self.hand_position = self.players[player_id].maxScroll
         self.build_hand_visual(player_id)
         
-        ### Adjust Player Tile ###
-        key_string_cards = 'P{}Cards'
-        self.elements[key_string_cards.format(player_id[-1])] = '  '+(' '*(3-len(str(self.players[player_id].get_card_num()))))+str(self.players[player_id].get_card_num())+' Cards'
-        
-        ### Adjust Deck ###
-        self.elements['DNum'] = len(self.deck)
-        if len(str(len(self.deck))) < 2:
-            self.elements['PostDNum'] = '\t'
-        j = 8
-        self.elements['Deck'] = [' ',' ',' ',' ',' ',' ',' ',' ', ' ']
-        for i in range(math.ceil(len(self.deck)/12)):
-            i #unused
-            self.elements['Deck'][j] = '='
-            j -= 1
+        ### Adjust Player Tile / Deck ###
+        self.view.mark_cards(player_id)
+        self.view.mark('deck')
+        self.recycle_pile()
+
+    def can_play(self, player_id):
+        '''Returns whether 'player_id' holds a card playable on the pile. Humans
+        may draw while holding one, so only a draw without one shows a void.'''
+        if self.current_color not in Deck.colors:
+            return True
+        playable = LEGAL_MASKS[(self.current_color, self.current_value)] | WILD_MASK | DRAW_FOUR_MASK
+        if self.zero_change:
+            playable |= ZERO_MASK
+        return bool(self.players[player_id].hand.mask & playable)
 
     def place_card(self, card=None):
+        player_id = self.turn
         if card == None:
             ### Used At Beginning For First Card ###
             card = self.deck.draw()
-            self.elements['DNum'] = len(self.deck)
-            
-        card_color = card.get_color_code()
-        card_big_nums = card.get_big_num(self.reverse)
+            player_id = None
+            self.opening = 1 if card.is_wild() else 0
+            self.view.mark('deck')
         
         self.current_color = card.get_color()
         self.current_value = card.get_value()
         
         self.pile.insert(card)
-        self.elements['oHeader'] = '{}\u2666\u2666\u2666=========\u2666\u2666\u2666\033[0m\t'.format(card_color)
-        self.elements['oMiddle'] = card_big_nums
-        
-        if len(self.pile) > 1:
-            previous_card = self.pile[1]
-            previous_card_color = previous_card.get_color_code()
-            self.elements['uHeader'] = '{}      \u2666\u2666\u2666=========\u2666\u2666\u2666\033[0m\t\t'.format(previous_card_color)
-            self.elements['uMiddle'] = '{}| |\033[0m'.format(previous_card_color)
-            self.elements['uLower'] = '{}\u2666\u2666\u2666\033[0m'.format(previous_card_color)
+        self.tracker.place(card, player_id)
+        if player_id != None and not card.is_wild():
+            self.log.append(card.code)
+        if self.moves != None:
+            self.moves.append(('place', player_id == None))
+        self.view.mark('pile')
             
         if self.current_color == 'wild':
             self.event = 'wild'
@@ -1084,9 +1875,30 @@ class Match:
         elif self.current_value == '+2':
                 self.draw_amount = 2
         self.passes = 0
+        self.recycle_pile()
+
+    def recycle_pile(self):
+        '''With reshuffling on, shuffles every pile card but the top back into an
+        empty deck, wilds turned back to wild, so the deck is empty only while
+        the pile holds a single card.'''
+        if not self.reshuffle or len(self.deck) > 0 or len(self.pile) < 2:
+            return
+        cards = self.pile.recycle()
+        if self.moves != None:
+            self.moves.append(('recycle', cards, [card.get_color() for card in cards], self.rng.getstate()))
+        for card in cards:
+            if card.is_wild():
+                card.change_color('wild')
+            self.tracker.unplace(card)
+            self.deck.place(card)
+        self.deck.shuffle(self.rng)
+        self.view.mark('deck')
+        self.view.mark('pile')
                 
     def extract_card(self, player_id, index):
         card = self.players[player_id].remove_card(index)
+        if self.moves != None:
+            self.moves.append(('extract', player_id, int(index), card))
         if self.players[player_id].get_card_num() == 0:
             self.match_complete = True
             self.winner_id = self.turn
@@ -1095,7 +1907,7 @@ class Match:
     
     def enter_break(self):
         if not self.simulation:
-            str(input())
+            self.read_input()
         return
             
     def next_turn(self):
@@ -1105,7 +1917,7 @@ class Match:
         self.players[self.turn].begin_turn()
         ### Prepare Hand Visuals ###
         
-        self.elements['HName'] = self.hand_titles[self.turn]
+        self.set_hand_title(self.turn)
         self.build_hand_visual(self.turn)
         
         if self.event == 'skip':
@@ -1117,18 +1929,18 @@ class Match:
             if turn_type == 'Human':
                 self.players[self.turn].get_legal_cards(self.current_color, self.current_value, self.zero_change)
                 if len(self.deck) > 0:
-                    self.elements['Console'] = 'Select a card, (D)raw, or (P)ause.'
+                    self.set_message('Console', 'Select a card, (D)raw, or (P)ause.')
                 else:
                     self.players[self.turn].remove_force_draw()
-                    self.elements['Console'] = 'Select a card, (D)raw, (P)ause, or Pas(s).'
+                    self.set_message('Console', 'Select a card, (D)raw, (P)ause, or Pas(s).')
                 if self.players[self.turn].get_force_draws() > 0:
-                    self.elements['Error'] = 'Draw Card Played! Draw {} cards.'.format(self.players[self.turn].get_force_draws())
-                print(self.draw_screen())
-                player_input = str(input("\033[97mSelection: \033[92m"))
+                    self.set_message('Error', 'Draw Card Played! Draw {} cards.', self.players[self.turn].get_force_draws())
+                self.show_screen()
+                player_input = self.read_input("\033[97mSelection: \033[92m", 'turn')
                 checked = self.check_input(player_input)
                 while not checked['valid']:
-                    print(self.draw_screen())
-                    player_input = str(input("\033[97mSelection: \033[92m"))
+                    self.show_screen()
+                    player_input = self.read_input("\033[97mSelection: \033[92m", 'turn')
                     checked = self.check_input(player_input)
     
                 player_input = checked['entry']
@@ -1145,10 +1957,10 @@ class Match:
                     self.build_hand_visual(self.turn)
                 elif player_input == 'd':
                     if len(self.deck) > 0:
-                        self.elements['Error'] = ''
+                        self.set_message('Error', '')
                         self.deal_card(self.turn)
                     else:
-                        self.elements['Error'] = "Cannot Draw. Deck is Empty"
+                        self.set_message('Error', "Cannot Draw. Deck is Empty")
                 elif player_input == 'p':
                     pause_output = self.pause_screen()
                     if pause_output == 'quit':
@@ -1158,32 +1970,28 @@ class Match:
                         self.match_abort = True
                 elif player_input == 's':
                     if len(self.deck) > 0:
-                        self.elements['Error'] = "Cannot pass until Deck is empty."
-                    elif len(self.players[self.turn].get_all_valid_cards()) > 0:
-                        self.elements['Error'] = "Cannot pass while having playable cards."
+                        self.set_message('Error', "Cannot pass until Deck is empty.")
+                    elif self.players[self.turn].has_valid_card():
+                        self.set_message('Error', "Cannot pass while having playable cards.")
                     else:
                         self.turn_complete = True
-                        self.passes += 1
-                        if self.passes == self.pass_max:
-                            self.forced_wild = True
-                            self.event = 'wild'
-                            self.passes = 0
+                        self.pass_turn()
                 elif player_input.isnumeric():
                     if self.players[self.turn].get_force_draws() == 0:
                         card_check = self.players[self.turn].check_card(player_input)
-                        if card_check in self.players[self.turn].get_all_valid_cards():
+                        if self.players[self.turn].is_valid_card(card_check):
                             card = self.extract_card(self.turn, player_input)
                             self.place_card(card)
-                            self.elements['Error'] = ""
+                            self.set_message('Error', "")
                             self.turn_complete = True
                         else:
-                            self.elements['Error'] = "Card Doesn't Match The Color {} or Value {}!".format(self.current_color, self.current_value)
+                            self.set_message('Error', "Card Doesn't Match The Color {} or Value {}!", self.current_color, self.current_value)
                     else:
                         pass
                     
             elif turn_type == 'Computer':
-                self.elements['Console'] = '{}\'s Turn'.format(self.players[self.turn].get_name())
-                print(self.draw_screen(self.hide_computer_hands))
+                self.set_message('Console', '{}\'s Turn', self.players[self.turn].get_name())
+                self.show_screen(self.hide_computer_hands)
                 if not self.simulation:
                     time.sleep(self.computer_speed)
                 #str(input())
@@ -1205,15 +2013,10 @@ class Match:
                         if card_index == 'd':
                             if len(self.deck) > 0:
                                 self.deal_card(self.turn)
-                                print(self.draw_screen(self.hide_computer_hands))
+                                self.show_screen(self.hide_computer_hands)
                             else:
                                 self.turn_complete = True
-                                self.players[self.turn].remove_force_draw()
-                                self.passes += 1
-                                if self.passes == self.pass_max:
-                                    self.forced_wild = True
-                                    self.event = 'wild'
-                                    self.passes = 0
+                                self.pass_turn()
                                 break
                 
             ### DECODE INPUT ###
@@ -1223,11 +2026,9 @@ class Match:
         elif self.event == 'wild':
             self.event_wild_card()
             
-        # Clear Current Turn
-        self.elements['P{}Turn'.format(self.turn[-1])] = ''
         # Prepare Next Turn
         self.turn = self.get_next_turn()
-        self.elements['P{}Turn'.format(self.turn[-1])] = '\033[93m'
+        self.set_highlight(self.turn, '\033[93m')
 
     def draw_screen(self, hide=False, wild_seed=0):
         if self.simulation:
@@ -1246,52 +2047,85 @@ class Match:
         else:
             color_mod = ['','','','']
 
-        self.clear_shell()
+        elements = self.view.refresh()
+        column = self.seat_column(elements)
         screenout = ''
         screenout += '\t\t\033[94m      || ||\033[92m ||\ ||  \033[91m// \\\\\n\033[0m'
         screenout += '\t\t\033[94m      || ||\033[92m ||\\\|| \033[91m((   ))\n\033[0m'
         screenout += '\t\t\033[94m      \\\ //\033[92m || \|| \033[91m \\\ //\n\033[0m'
         screenout += '\033[97m===============================================================\n'
-        screenout += '\033[93m{}\033[0m\n'.format(self.elements['Console'])
+        screenout += '\033[93m{}\033[0m\n'.format(elements['Console'])
         screenout += '\033[97m===============================================================\n'
-        screenout += '\t\t\t\t\t\t'     +        ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P1Turn'])
-        screenout += '\033[97mDeck:\t\t'        +       '{}'.format(self.elements['uHeader'])       +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P1Turn'],self.elements['P1Name'])
-        screenout += '\033[97m{} Cards'.format(self.elements['DNum'])       +       '{}'.format(self.elements['PostDNum'])+'\t'     +       '{}'.format(self.elements['uHeader'])       +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P1Turn'],self.elements['P1Cards'])
-        screenout += '\t\t      '       +      '{}'.format(self.elements['uMiddle'])        +       '\033[97m{}{}'.format(color_mod[0],self.elements['oHeader'])     +      ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P1Turn'])
-        screenout += '\033[97m  _+_ \t\t      '     +       '{}'.format(self.elements['uMiddle'])                                                                                                   +       '\033[97m{}{}'.format(color_mod[1],self.elements['oHeader'])         +       ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P2Turn'])                                                                                  
-        screenout += '\033[97m | '      +       '\033[92m{}\033[0m'.format(self.elements['Deck'][0])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[2],self.elements['oMiddle'][0])      +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P2Turn'],self.elements['P2Name'])
-        screenout += '\033[97m | '      +       '\033[92m{}\033[0m'.format(self.elements['Deck'][1])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[3],self.elements['oMiddle'][1])      +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P2Turn'],self.elements['P2Cards'])
-        screenout += '\033[97m | '      +       '\033[92m{}\033[0m'.format(self.elements['Deck'][2])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[0],self.elements['oMiddle'][2])      +       ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P2Turn'])
-        screenout += '\033[97m | '      +       '\033[93m{}\033[0m'.format(self.elements['Deck'][3])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[1],self.elements['oMiddle'][3])      +       ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P3Turn'])
-        screenout += '\033[97m | '      +       '\033[93m{}\033[0m'.format(self.elements['Deck'][4])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[2],self.elements['oMiddle'][4])      +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P3Turn'],self.elements['P3Name'])
-        screenout += '\033[97m | '      +       '\033[93m{}\033[0m'.format(self.elements['Deck'][5])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[3],self.elements['oMiddle'][5])      +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P3Turn'],self.elements['P3Cards'])
-        screenout += '\033[97m | '      +       '\033[91m{}\033[0m'.format(self.elements['Deck'][6])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uLower'])        +       '\033[97m{}{}'.format(color_mod[0],self.elements['oMiddle'][6])      +       ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P3Turn'])
-        screenout += '\033[97m | '      +       '\033[91m{}\033[0m'.format(self.elements['Deck'][7])        +       '\033[97m |\t\t      '      +       '{}'.format(self.elements['uLower'])        +       '\033[97m{}{}'.format(color_mod[1],self.elements['oMiddle'][7])      +       ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P4Turn'])
-        screenout += '\033[97m |_'      +     '\033[91m{}\033[0m'.format(self.elements['Deck'][8])          +        '\033[97m_|\t\t         '                                                      +      '\033[97m{}{}'.format(color_mod[2],self.elements['oHeader'])          +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P4Turn'],self.elements['P4Name'])
-        screenout += '\033[97m\t\t         '    +                                                                                                                                                                   '\033[97m{}{}'.format(color_mod[3],self.elements['oHeader'])         +       ' \033[97m{}|{}|\033[0m\n'.format(self.elements['P4Turn'],self.elements['P4Cards'])
-        screenout += '\t\t\t\t\t\t'     +       ' \033[97m{}\u2666-----------\u2666\033[0m\n'.format(self.elements['P4Turn'])
-        screenout += "\033[97m{}".format(self.elements['HName'])        +       "\t\t\t\t {}\n".format(self.elements['HVisual'])
+        screenout += '\t\t\t\t\t\t'     +        column[0] + '\n'
+        screenout += '\033[97mDeck:\t\t'        +       '{}'.format(elements['uHeader'])       +       column[1] + '\n'
+        screenout += '\033[97m{} Cards'.format(elements['DNum'])       +       '{}'.format(elements['PostDNum'])+'\t'     +       '{}'.format(elements['uHeader'])       +       column[2] + '\n'
+        screenout += '\t\t      '       +      '{}'.format(elements['uMiddle'])        +       '\033[97m{}{}'.format(color_mod[0],elements['oHeader'])     +      column[3] + '\n'
+        screenout += '\033[97m  _+_ \t\t      '     +       '{}'.format(elements['uMiddle'])                                                                                                   +       '\033[97m{}{}'.format(color_mod[1],elements['oHeader'])         +       column[4] + '\n'                                                                                  
+        screenout += '\033[97m | '      +       '\033[92m{}\033[0m'.format(elements['Deck'][0])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[2],elements['oMiddle'][0])      +       column[5] + '\n'
+        screenout += '\033[97m | '      +       '\033[92m{}\033[0m'.format(elements['Deck'][1])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[3],elements['oMiddle'][1])      +       column[6] + '\n'
+        screenout += '\033[97m | '      +       '\033[92m{}\033[0m'.format(elements['Deck'][2])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[0],elements['oMiddle'][2])      +       column[7] + '\n'
+        screenout += '\033[97m | '      +       '\033[93m{}\033[0m'.format(elements['Deck'][3])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[1],elements['oMiddle'][3])      +       column[8] + '\n'
+        screenout += '\033[97m | '      +       '\033[93m{}\033[0m'.format(elements['Deck'][4])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[2],elements['oMiddle'][4])      +       column[9] + '\n'
+        screenout += '\033[97m | '      +       '\033[93m{}\033[0m'.format(elements['Deck'][5])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uMiddle'])       +       '\033[97m{}{}'.format(color_mod[3],elements['oMiddle'][5])      +       column[10] + '\n'
+        screenout += '\033[97m | '      +       '\033[91m{}\033[0m'.format(elements['Deck'][6])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uLower'])        +       '\033[97m{}{}'.format(color_mod[0],elements['oMiddle'][6])      +       column[11] + '\n'
+        screenout += '\033[97m | '      +       '\033[91m{}\033[0m'.format(elements['Deck'][7])        +       '\033[97m |\t\t      '      +       '{}'.format(elements['uLower'])        +       '\033[97m{}{}'.format(color_mod[1],elements['oMiddle'][7])      +       column[12] + '\n'
+        screenout += '\033[97m |_'      +     '\033[91m{}\033[0m'.format(elements['Deck'][8])          +        '\033[97m_|\t\t         '                                                      +      '\033[97m{}{}'.format(color_mod[2],elements['oHeader'])          +       column[13] + '\n'
+        screenout += '\033[97m\t\t         '    +                                                                                                                                                                   '\033[97m{}{}'.format(color_mod[3],elements['oHeader'])         +       column[14] + '\n'
+        screenout += '\t\t\t\t\t\t'     +       column[15] + '\n'
+        screenout += "\033[97m{}".format(elements['HName'])        +       "\t\t\t\t {}\n".format(elements['HVisual'])
         screenout += '\033[97m===============================================================\n'
         screenout += self.players[current_turn].get_hand(self.hand_position,hide)
-        screenout += '\033[91m{}\033[0m'.format(self.elements['Error'])
+        screenout += '\033[91m{}\033[0m'.format(elements['Error'])
         return screenout
     
+    def seat_column(self, elements):
+        '''Returns the 16 lines right of the pile: a tile per seat for up to four
+        players, or else a compact list with a line per seat.'''
+        if len(self.turn_list) <= 4:
+            column = []
+            for seat in ('1','2','3','4'):
+                turn = elements['P{}Turn'.format(seat)]
+                border = ' \033[97m{}\u2666-----------\u2666\033[0m'.format(turn)
+                column += [border,
+                           ' \033[97m{}|{}|\033[0m'.format(turn, elements['P{}Name'.format(seat)]),
+                           ' \033[97m{}|{}|\033[0m'.format(turn, elements['P{}Cards'.format(seat)]),
+                           border]
+            return column
+        column = []
+        for identity in self.turn_list:
+            seat = identity[4:]
+            column.append(' \033[97m{}{}{}\033[0m'.format(elements['P{}Turn'.format(seat)], elements['P{}Name'.format(seat)],
+                                                          elements['P{}Count'.format(seat)]))
+        return column + ['']*(16-len(column))
+
     def pause_screen(self):
+        message = ''
         while True:
-            self.clear_shell()
-            print('\n\t\t\tPause')
-            print('\n\t\t1. Resume')
-            print('\t\t2. Quit')
+            if not self.simulation:
+                self.clear_shell()
+                print('\n\t\t\tPause')
+                print('\n\t\t1. Resume')
+                print('\t\t2. Save')
+                print('\t\t3. Quit')
+                print('\n\t\t{}'.format(message))
             
-            selection = str(input('\nSelection: ')).upper()
-            while selection not in ['1', '2']:
-                print('\nSelection Invalid')
-                selection = str(input('\nSelection: ')).upper()
+            selection = self.read_input('\nSelection: ', 'pause').upper()
+            while selection not in ['1', '2', '3']:
+                if not self.simulation:
+                    print('\nSelection Invalid')
+                selection = self.read_input('\nSelection: ', 'pause').upper()
                 
             if selection == '1' or "":
                 return ""
-                
+
             elif selection == '2':
+                try:
+                    self.save_snapshot(self.settings.save_path)
+                    message = 'Match Saved'
+                except OSError as error:
+                    message = 'Could Not Save: {}'.format(error.strerror)
+                
+            elif selection == '3':
                 return "quit"
                 
     
@@ -1306,17 +2140,8 @@ class Match:
             reverse = not self.reverse
         else:
             reverse = self.reverse
-        current_index = self.turn_list.index(self.turn)
-        if not reverse:
-            if (current_index + 1) == len(self.turn_list):
-                return self.turn_list[0]
-            else:
-                return self.turn_list[current_index+1]
-        else:
-            if current_index == 0:
-                return self.turn_list[len(self.turn_list) - 1]
-            else:
-                return self.turn_list[current_index-1]
+        step = -1 if reverse else 1
+        return self.turn_list[(self.seat_index[self.turn] + step) % len(self.turn_list)]
             
     def get_player(self, player_id):
         return self.players[player_id]
@@ -1325,79 +2150,548 @@ class Match:
         for identity in self.players:
             self.players[identity].drew = False
 
-def Uno(debugging=False):
+    ### -\/-  Snapshots  -\/- ###
 
-    ###MENUS###
-    
-    def clear_shell():
-        os.system('cls' if os.name == 'nt' else 'clear')
+    def snapshot(self):
+        '''Returns the match and its settings as builtin values only: cards as
+        codes, generators as their states. Taken between turns or while a human
+        player decides; restore() resumes from the start of that turn.'''
+        players = []
+        for identity in self.turn_list:
+            player = self.players[identity]
+            players.append({'type' : player.get_type(), 'name' : player.get_name(), 'points' : player.points,
+                            'hand' : [card.code for card in player.hand], 'drew' : player.drew, 'force_draw' : player.force_draw,
+                            'think_time' : player.think_time if isinstance(player, SearchComputerPlayer) else None,
+                            'rng' : player.rng.getstate() if isinstance(player, SearchComputerPlayer) else None})
+        tracker = self.tracker
+        return {'settings' : {key : getattr(self.settings, key) for key in self.snapshot_settings},
+                'players' : players,
+                'fields' : {key : getattr(self, key) for key in self.snapshot_fields},
+                'deck' : [card.code for card in self.deck],
+                'pile' : [(card.code, card.get_color()) for card in self.pile],
+                'seed' : self.seed, 'rng' : self.rng.getstate(), 'ai_rng' : self.ai_rng.getstate(), 'log' : bytes(self.log),
+                'tracker' : (list(tracker.unseen), dict(tracker.unseen_colors), dict(tracker.unseen_values),
+                             {identity : sorted(tracker.voids[identity]) for identity in tracker.voids})}
 
-    def main_menu():
-        sys.stdout.write("\x1b[8;32;63t")
-        sys.stdout.flush()
+    @classmethod
+    def restore(cls, state):
+        '''Returns a Match, with fresh GameSettings, rebuilt from snapshot().'''
         gs = GameSettings()
-        
-        while True:
- 
-            print(draw_main_menu(gs))
-            
-            selection = str(input('\033[97mSelection: \033[92m'))
-            while selection not in ['1', '2', '3', '4', '5']:
-                gs.main_menu_error = "Invalid Selection"
-                print(draw_main_menu(gs))
-                selection = str(input('\033[97mSelection: \033[92m'))
-                
-            if selection == '1':
-                if gs.can_begin():
-                    gs.main_menu_error = ""
-                    gs.finalize_players()
-                    gs = play_match(gs)
-                else:
-                    gs.main_menu_error = "Two Players Required to Begin"
+        for key in cls.snapshot_settings:
+            if key in state['settings']:
+                setattr(gs, key, state['settings'][key])
+        for entry in state['players']:
+            if entry['type'] == 'Human':
+                player = Player(entry['name'])
+            elif entry['think_time'] != None:
+                player = SearchComputerPlayer(entry['name'], entry['think_time'])
+                player.rng.setstate(entry['rng'])
+            else:
+                player = ComputerPlayer(entry['name'])
+            player.points = entry['points']
+            gs.add_player(player)
+        gs.finalize_players()
 
-            elif selection == '2':
-                if gs.can_add_player():
-                    gs.main_menu_error = ""
-                    gs = add_player(gs)
-                else:
-                    gs.main_menu_error = "Max Number of Players Reached"
-                    
-            elif selection == '3':
-                if gs.can_add_player():
-                    gs.main_menu_error = ""
-                    gs = add_computer(gs)
-                else:
-                    gs.main_menu_error = "Max Number of Players Reached"
+        m = cls(gs, state['seed'])
+        for key in cls.snapshot_fields:
+            if key in state['fields']:
+                setattr(m, key, state['fields'][key])
+        m.deck.deck = [Card.from_code(code) for code in state['deck']]
+        for code, color in state['pile']:
+            card = Card.from_code(code)
+            if card.is_wild():
+                card.change_color(color)
+            m.pile.place(card)
+        for identity, entry in zip(m.turn_list, state['players']):
+            player = m.players[identity]
+            for code in entry['hand']:
+                player.hand.add_card(Card.from_code(code))
+            player.drew = entry['drew']
+            player.force_draw = entry['force_draw']
+            player.maxScroll = math.ceil((player.get_card_num() / 10)-1)
+        m.rng.setstate(state['rng'])
+        m.ai_rng.setstate(state['ai_rng'])
+        m.log = bytearray(state['log'])
+        unseen, unseen_colors, unseen_values, voids = state['tracker']
+        m.tracker.unseen = list(unseen)
+        m.tracker.unseen_colors = dict(unseen_colors)
+        m.tracker.unseen_values = dict(unseen_values)
+        m.tracker.voids = {identity : set(voids[identity]) for identity in voids}
+        if m.turn != '':
+            m.set_highlight(m.turn, '\033[93m')
+        return m
 
-            elif selection == '4':
-                if gs.can_remove_player():
-                    gs.main_menu_error = ""
-                    gs = remove_player(gs)
-                else:
-                    gs.main_menu_error = "No Players to Remove"
+    def save_snapshot(self, path):
+        '''Writes snapshot() to 'path', compressed. The file is written beside
+        'path' and renamed over it, so an interrupted save leaves the last one whole.'''
+        data = self.snapshot_magic + zlib.compress(pickle.dumps(self.snapshot(), pickle.HIGHEST_PROTOCOL))
+        handle, temporary = tempfile.mkstemp(prefix='.uno-', dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(handle, 'wb') as save_file:
+                save_file.write(data)
+                save_file.flush()
+                os.fsync(save_file.fileno())
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self.snapshot_path = path
 
-            elif selection == '5':
-                gs.main_menu_error = ""
-                gs = settings_menu(gs)
+    @classmethod
+    def load_snapshot(cls, path):
+        '''Returns the Match save_snapshot() wrote to 'path'.'''
+        with open(path, 'rb') as save_file:
+            data = save_file.read()
+        if not data.startswith(cls.snapshot_magic):
+            raise BadInputError('Not a Saved Match')
+        try:
+            state = _SnapshotUnpickler(io.BytesIO(zlib.decompress(data[len(cls.snapshot_magic):]))).load()
+        except (zlib.error, pickle.UnpicklingError, EOFError) as error:
+            raise BadInputError('Saved Match Is Damaged: {}'.format(error))
+        m = cls.restore(state)
+        m.snapshot_path = path
+        return m
 
-            else:
-                raise BadInputError('Data Provided Has No Function')
-            
+    def discard_snapshot(self):
+        '''Deletes the save this match was last saved to or resumed from, so a
+        finished match cannot be resumed and scored again.'''
+        if self.snapshot_path != None:
+            try:
+                os.remove(self.snapshot_path)
+            except FileNotFoundError:
+                pass
+            self.snapshot_path = None
+
+    ### -\/-  Search Interface  -\/- ###
+
+    def start(self, color=None, ask=True):
+        '''Deals and turns the first card as begin() does, but without screens or
+        pauses, leaving the match ready for apply(). 'color' names the color of
+        a wild first card; if None, the first player is asked as in begin(), or
+        with 'ask' False the wild is left for name_first_color().'''
+        for identity in self.turn_list:
+            for i in range(7):
+                i #unused
+                self.deal_card(identity)
+        self.turn = self.rng.choice(self.turn_list)
+        self.place_card()
+        self.set_highlight(self.turn, '\033[93m')
+        if self.event == 'wild' and color != None:
+            self.name_first_color(color)
+            return
+        elif self.event == 'wild' and not ask:
+            return
+        elif self.event == 'wild':
+            self.event_wild_card()
+        elif self.event == 'reverse':
+            self.reverse = not self.reverse
+            self.event = ''
+        self.settle()
+
+    def name_first_color(self, color):
+        '''Names 'color' for a wild first card and starts the first turn.'''
+        self.tracker.change_color(self.turn, color)
+        self.record_color(color)
+        self.recolor(color)
+        self.event = ''
+        self.settle()
+
+    def legal_actions(self):
+        '''Returns the actions apply() accepts from the player on turn.'''
+        player = self.players[self.turn]
+        player.get_legal_cards(self.current_color, self.current_value, self.zero_change)
+        actions = SearchState.moves(player.legal_mask | player.wild_mask | player.zero_mask)
+        if len(self.deck) > 0:
+            actions.append(MOVE_DRAW)
+        elif not actions:
+            actions.append(MOVE_PASS)
+        return actions
+
+    def apply(self, action):
+        '''Plays 'action' for the player on turn and runs on to the next decision.
+
+        Actions are search moves (a card code, wilds with the color they name),
+        MOVE_DRAW or MOVE_PASS. Nothing is drawn or asked for; the card moves
+        and the scalars they change are journaled so undo() can take the
+        action back without copying the match.'''
+        player = self.players[self.turn]
+        self.moves = []
+        self.journal.append((self.moves, len(self.log),
+                             (self.turn, self.reverse, self.current_color, self.current_value, self.draw_amount,
+                              self.passes, self.event, self.match_complete, self.winner_id, self.hand_position),
+                             [(other.drew, other.force_draw) for other in self.players.values()],
+                             [set(voids) for voids in self.tracker.voids.values()]))
+        if action == MOVE_DRAW:
+            self.deal_card(self.turn)
+        elif action == MOVE_PASS:
+            self.pass_turn()
+            if self.forced_wild:
+                self.forced_wild = False
+                self.event = ''
+                self.moves.append(('rng', self.rng.getstate()))
+                color = self.check_color_input(self.rng.choice(('r','b','g','y')))['entry']
+                self.tracker.change_color(self.turn, color, True)
+                self.recolor(color)
+            self.end_turn()
+        else:
+            code, color, value = SearchState.decode(action)
+            card = self.extract_card(self.turn, player.hand.index_card(player.hand.buckets[code][0]))
+            if player.get_type() == 'Computer' and card.get_color() != self.current_color:
+                self.reset_draw_bool()
+            self.place_card(card)
+            if self.event == 'reverse':
+                self.reverse = not self.reverse
+                self.event = ''
+            elif self.event == 'wild':
+                self.tracker.change_color(self.turn, Deck.colors[color])
+                self.record_color(Deck.colors[color])
+                self.recolor(Deck.colors[color])
+                self.event = ''
+            self.end_turn()
+        self.moves = None
+
+    def pass_turn(self):
+        '''Passes with nothing to play and an empty deck; once everyone has passed a wild is forced.'''
+        self.players[self.turn].remove_force_draw()
+        self.log.append(MOVE_PASS)
+        self.passes += 1
+        if self.passes == self.pass_max:
+            self.forced_wild = True
+            self.event = 'wild'
+            self.passes = 0
+
+    def record_color(self, color):
+        '''Logs the wild on the pile as played with 'color' named.'''
+        code = self.pile[0].code
+        self.log.append(SearchState.encode(code, Deck.colors.index(color)))
+
+    def export_log(self):
+        '''Returns the match as bytes: a header with the seed, then one byte per action.
+
+        Actions are Match.apply() actions. Forced draws and forced wilds follow
+        from the seed, so only choices are logged; a wild first card is
+        followed by the color named for it.'''
+        flags = self.zero_change | self.reshuffle << 1
+        return struct.pack(self.log_header, 2, self.seed, len(self.turn_list), flags) + bytes(self.log)
+
+    @classmethod
+    def parse_log(cls, data):
+        '''Returns (seed, players, zero change, reshuffle, actions) from export_log() bytes.
+        Version 1 logs, which had only the zero change flag, read as not reshuffling.'''
+        size = struct.calcsize(cls.log_header)
+        version, seed, players, flags = struct.unpack(cls.log_header, data[:size])
+        if version not in (1, 2):
+            raise BadInputError('Unknown Match Log Version {}'.format(version))
+        return seed, players, bool(flags & 1), bool(flags & 2), bytes(data[size:])
+
+    def save_log(self, directory):
+        '''Writes export_log() into 'directory', named by time and seed; returns the path.'''
+        path = os.path.join(directory, 'uno-{}-{}.log'.format(time.strftime('%Y%m%d-%H%M%S'), self.seed))
+        with open(path, 'wb') as log_file:
+            log_file.write(self.export_log())
+        return path
+
+    def recolor(self, color):
+        '''Turns the pile's top card and the current color to 'color', as a wild does.'''
+        if self.moves != None:
+            self.moves.append(('recolor', self.pile[0], self.pile[0].get_color()))
+        self.pile[0].change_color(color)
+        self.current_color = color
+        self.view.mark('pile')
+
+    def end_turn(self):
+        self.turn = self.get_next_turn()
+        if not self.match_complete:
+            self.settle()
+
+    def settle(self):
+        '''Starts the turn as next_turn does before asking for a move: a skip
+        passes it on and pending draws are dealt while the deck lasts.'''
+        player = self.players[self.turn]
+        player.begin_turn()
+        while self.event == 'skip':
+            self.event = ''
+            self.turn = self.get_next_turn()
+            player = self.players[self.turn]
+            player.begin_turn()
+        if self.draw_amount > 0:
+            self.event_draw()
+        while player.get_force_draws() > 0 and len(self.deck) > 0:
+            self.deal_card(self.turn)
+
+    def undo(self):
+        '''Takes back the last apply().'''
+        moves, log_length, scalars, flags, voids = self.journal.pop()
+        del self.log[log_length:]
+        for move in reversed(moves):
+            if move[0] == 'draw':
+                hand = self.players[move[1]].hand
+                self.deck.place(hand.remove_card(len(hand) - 1))
+                self.adjust_card_amount(move[1])
+            elif move[0] == 'place':
+                card = self.pile.take()
+                self.tracker.unplace(card)
+                if move[1]:
+                    self.deck.place(card)
+            elif move[0] == 'extract':
+                self.players[move[1]].hand.insert_card(move[2], move[3])
+                self.adjust_card_amount(move[1])
+            elif move[0] == 'recolor':
+                move[1].change_color(move[2])
+            elif move[0] == 'rng':
+                self.rng.setstate(move[1])
+            elif move[0] == 'recycle':
+                self.deck.deck = []
+                for card, color in zip(move[1], move[2]):
+                    card.change_color(color)
+                    self.tracker.place(card)
+                    self.pile.place(card)
+                self.rng.setstate(move[3])
+        (self.turn, self.reverse, self.current_color, self.current_value, self.draw_amount,
+         self.passes, self.event, self.match_complete, self.winner_id, self.hand_position) = scalars
+        for player, (drew, force_draw) in zip(self.players.values(), flags):
+            player.drew = drew
+            player.force_draw = force_draw
+        for identity, player_voids in zip(self.tracker.voids, voids):
+            self.tracker.voids[identity] = player_voids
+        self.view.mark('deck')
+        self.view.mark('pile')
+
+class ReplayPlayer:
+    '''Plays back a match from Match.export_log() bytes.
+
+    seek() moves to any action, forward with Match.apply() and back with
+    undo(), drawing nothing on the way; show() draws the position reached and
+    resume() lets the seated players finish the match from there.'''
+
+    def __init__(self, data, gs=None):
+        self.seed, players, zero_change, reshuffle, self.actions = Match.parse_log(data)
+        if gs == None:
+            gs = build_simulation_settings(players)
+        gs.zero_change = zero_change
+        gs.reshuffle_pile = reshuffle
+        gs.computer_simulation = True
+        gs.finalize_players()
+        self.match = Match(gs, self.seed)
+        color = None
+        if self.actions and WILD_CODE <= self.actions[0] < MOVE_DRAW:
+            color = Deck.colors[SearchState.decode(self.actions[0])[1]]
+        self.match.start(color)
+        self.first = self.match.opening
+        self.position = 0
+
+    def __len__(self):
+        return len(self.actions) - self.first
+
+    def seek(self, position):
+        '''Moves to just after the first 'position' actions and returns the match.'''
+        position = max(0, min(position, len(self)))
+        while self.position > position:
+            self.match.undo()
+            self.position -= 1
+        while self.position < position:
+            self.match.apply(self.actions[self.first + self.position])
+            self.position += 1
+        return self.match
+
+    def show(self, hide=False):
+        '''Returns the screen at the current position.'''
+        self.match.simulation = False
+        try:
+            return self.match.draw_screen(hide)
+        finally:
+            self.match.simulation = True
+
+    def resume(self):
+        '''Plays the match out from the current position with the seated players'
+        own choices instead of the log, and returns it.'''
+        while not self.match.is_complete():
+            self.match.next_turn()
+        return self.match
+
+class ScoreStore:
+    '''Match results kept in SQLite at 'path'.
+
+    Every match adds a row per seat to 'results', indexed by player for
+    history(). Running sums per player live in 'totals', indexed by points,
+    so top() reads a handful of rows however many matches are stored. Rows
+    are written in one transaction per record_many() call and top() answers
+    from a cache until the next write.'''
+
+    schema = (
+        'CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, played REAL NOT NULL, seed INTEGER, '
+        'player TEXT NOT NULL, points INTEGER NOT NULL, won INTEGER NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS results_player ON results (player, id)',
+        'CREATE TABLE IF NOT EXISTS totals (player TEXT PRIMARY KEY, points INTEGER NOT NULL, '
+        'wins INTEGER NOT NULL, matches INTEGER NOT NULL)',
+        'CREATE INDEX IF NOT EXISTS totals_points ON totals (points DESC)',
+        )
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            for statement in self.schema:
+                self.connection.execute(statement)
+        self.top_cache = {}                 #    Count : top() rows, cleared on every write
+
+    @staticmethod
+    def match_rows(match):
+        '''Returns a finished Match's (seed, player, points, won) rows; call before end() tallies it.'''
+        if match.match_abort or not match.is_complete():
+            return []
+        points = match.winner_points()
+        return [(match.seed, match.players[identity].get_name(), points if identity == match.winner_id else 0,
+                 identity == match.winner_id) for identity in match.turn_list]
+
+    def record_match(self, match):
+        '''Records a finished Match before end() tallies it; aborted matches are skipped.'''
+        rows = self.match_rows(match)
+        if rows:
+            self.record_many(rows)
+
+    def record_many(self, rows, played=None):
+        '''Writes (seed, player, points, won) rows in a single transaction.'''
+        if played == None:
+            played = time.time()
+        totals = {}                         #    Player : [Points, Wins, Matches]
+        for seed, player, points, won in rows:
+            total = totals.setdefault(player, [0, 0, 0])
+            total[0] += points
+            total[1] += bool(won)
+            total[2] += 1
+        with self.connection:
+            self.connection.executemany('INSERT INTO results (played, seed, player, points, won) VALUES (?, ?, ?, ?, ?)',
+                                        ((played, seed, player, points, bool(won)) for seed, player, points, won in rows))
+            self.connection.executemany('INSERT INTO totals VALUES (?, ?, ?, ?) ON CONFLICT (player) DO UPDATE SET '
+                                        'points = points + excluded.points, wins = wins + excluded.wins, '
+                                        'matches = matches + excluded.matches',
+                                        ((player,) + tuple(total) for player, total in totals.items()))
+        self.top_cache.clear()
+
+    def top(self, count=10):
+        '''Returns up to 'count' (player, points, wins, matches) rows, most points first.'''
+        if count not in self.top_cache:
+            self.top_cache[count] = self.connection.execute(
+                'SELECT player, points, wins, matches FROM totals ORDER BY points DESC LIMIT ?', (count,)).fetchall()
+        return self.top_cache[count]
+
+    def history(self, player, count=20):
+        '''Returns 'player's last 'count' (played, seed, points, won) rows, newest first.'''
+        return self.connection.execute('SELECT played, seed, points, won FROM results WHERE player = ? ORDER BY id DESC LIMIT ?',
+                                       (player, count)).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+def Uno(debugging=False, log_dir=None, score_path=None):
+
+    ###MENUS###
+    
+    def clear_shell():
+        os.system('cls' if os.name == 'nt' else 'clear')
+
+    def main_menu():
+        sys.stdout.write("\x1b[8;32;63t")
+        sys.stdout.flush()
+        gs = GameSettings()
+        gs.log_dir = log_dir
+        gs.score_path = score_path
+        
+        while True:
+ 
+            print(draw_main_menu(gs))
+            
+            selection = str(input('\033[97mSelection: \033[92m'))
+            while selection not in ['1', '2', '3', '4', '5', '6']:
+                gs.main_menu_error = "Invalid Selection"
+                print(draw_main_menu(gs))
+                selection = str(input('\033[97mSelection: \033[92m'))
+                
+            if selection == '1':
+                if gs.computer_simulation and not gs.computers_only():
+                    gs.main_menu_error = "Simulations Require Computer Players Only"
+                elif gs.can_begin():
+                    gs.main_menu_error = ""
+                    gs.finalize_players()
+                    gs = play_match(gs)
+                else:
+                    gs.main_menu_error = "Two Players Required to Begin"
+
+            elif selection == '2':
+                if gs.can_add_player():
+                    gs.main_menu_error = ""
+                    gs = add_player(gs)
+                else:
+                    gs.main_menu_error = "Max Number of Players Reached"
+                    
+            elif selection == '3':
+                if gs.can_add_player():
+                    gs.main_menu_error = ""
+                    gs = add_computer(gs)
+                else:
+                    gs.main_menu_error = "Max Number of Players Reached"
+
+            elif selection == '4':
+                if gs.can_remove_player():
+                    gs.main_menu_error = ""
+                    gs = remove_player(gs)
+                else:
+                    gs.main_menu_error = "No Players to Remove"
+
+            elif selection == '5':
+                gs.main_menu_error = ""
+                gs = settings_menu(gs)
+
+            elif selection == '6':
+                if os.path.exists(gs.save_path):
+                    gs.main_menu_error = ""
+                    gs = resume_match(gs)
+                else:
+                    gs.main_menu_error = "No Saved Match to Resume"
+
+            else:
+                raise BadInputError('Data Provided Has No Function')
+            
     def play_match(gs):
         for i in range(1):
             i
             m = Match(gs)
             m.begin()
-            while (not m.is_complete()):
-                m.next_turn()
-            gs = m.end(gs)
+            gs = finish_match(gs, m)
         return gs
+
+    def resume_match(gs):
+        try:
+            m = Match.load_snapshot(gs.save_path)
+        except (OSError, BadInputError) as error:
+            gs.main_menu_error = "Could Not Resume: {}".format(error)
+            return gs
+        m.settings.carry_runtime_settings(gs)
+        m.source = gs.decision_source or m.source
+        return finish_match(m.settings, m)
+
+    def finish_match(gs, m):
+        while (not m.is_complete()):
+            m.next_turn()
+        if gs.log_dir != None:
+            m.save_log(gs.log_dir)
+        store = gs.get_score_store()
+        if store != None:
+            store.record_match(m)
+        if gs.match_stats != None:
+            gs.match_stats.add_match(m)
+        if not m.match_abort:
+            m.discard_snapshot()
+        return m.end(gs)
             
     def add_player(gs):
         colors = ['\033[91m','\033[94m', '\033[92m', '\033[93m']
         name_okay = False
         player_num = gs.get_player_num() + 1
-        color_index = player_num - 1
+        color_index = (player_num - 1) % 4
         message = "\033[97mPlease Enter Player {}'s Name: {}".format(player_num, colors[color_index])
         
         while not name_okay:
@@ -1424,7 +2718,10 @@ def Uno(debugging=False):
     
     def add_computer(gs):
         name = gs.get_computer_name()
-        c = ComputerPlayer(name)
+        if gs.computer_think_time > 0:
+            c = SearchComputerPlayer(name, gs.computer_think_time)
+        else:
+            c = ComputerPlayer(name)
         gs.add_player(c)
         
         return gs
@@ -1467,11 +2764,13 @@ def Uno(debugging=False):
             print('\t2. Hide Computer Hands\t\t{}'.format(gs.hide_computer_hands))
             print('\t3. Computer Speed\t\t{}'.format(gs.computer_speed.title()))
             #print('\t4. Zero Card Changes Color\t{}'.format(gs.zeroChange))
-            #print('\t5. Run Simulations\t\t{}'.format(gs.computerSimulation))
+            print('\t5. Run Simulations\t\t{}'.format(gs.computer_simulation))
+            print('\t6. Computer Think Time\t\t{}'.format('{}s'.format(gs.computer_think_time) if gs.computer_think_time else 'Off'))
+            print('\t7. Reshuffle Discard Pile\t{}'.format(gs.reshuffle_pile))
             print('\n\tA. Exit')
             
             selection = str(input('\nSelection: ')).upper()
-            while selection not in ('1', '2', '3', '4', '5', 'A', ''):
+            while selection not in ('1', '2', '3', '4', '5', '6', '7', 'A', ''):
                 print('\nSelection Invalid')
                 selection = str(input('\nSelection: ')).upper()
                 
@@ -1486,22 +2785,21 @@ def Uno(debugging=False):
                 '''
             elif selection == '4':
                 gs.zeroChange = not gs.zeroChange
-                
-            elif selection == '5':
-                gs.computerSimulation = not gs.computerSimulation
                 '''
-            elif selection == 'A' or selection == '' or selection in ('4','5'):
+            elif selection == '5':
+                gs.computer_simulation = not gs.computer_simulation
+
+            elif selection == '6':
+                gs.change_computer_think_time()
+
+            elif selection == '7':
+                gs.reshuffle_pile = not gs.reshuffle_pile
+                
+            elif selection == 'A' or selection == '' or selection == '4':
                 return gs
     
-    def draw_main_menu(gs):
-        clear_shell()
-        gs.compile_main_menu_elements()
-        menu_elements = gs.get_main_menu_elements()
+    def draw_player_boxes(menu_elements):
         screenout = ''
-        screenout += '\t\t\033[94m      || ||\033[92m ||\ ||  \033[91m// \\\\\n\033[0m'
-        screenout += '\t\t\033[94m      || ||\033[92m ||\\\|| \033[91m((   ))\n\033[0m'
-        screenout += '\t\t\033[94m      \\\ //\033[92m || \|| \033[91m \\\ //\n\033[0m'
-        screenout += '\033[97m===============================================================\033[0m\n'
         screenout += "{}1-----------------------------1\033[0m {}2-----------------------------2\033[0m\n".format(menu_elements['play1box'],menu_elements['play2box'])
         screenout += "{}|{}|\033[0m {}|{}|\033[0m\n".format(menu_elements['play1box'],menu_elements['play1row1'],menu_elements['play2box'],menu_elements['play2row1'])
         screenout += "{}|{}|\033[0m {}|{}|\033[0m\n".format(menu_elements['play1box'],menu_elements['play1row2'],menu_elements['play2box'],menu_elements['play2row2'])
@@ -1510,21 +2808,37 @@ def Uno(debugging=False):
         screenout += "{}|{}|\033[0m {}|{}|\033[0m\n".format(menu_elements['play3box'],menu_elements['play3row1'],menu_elements['play4box'],menu_elements['play4row1'])
         screenout += "{}|{}|\033[0m {}|{}|\033[0m\n".format(menu_elements['play3box'],menu_elements['play3row2'],menu_elements['play4box'],menu_elements['play4row2'])
         screenout += "{}3-----------------------------3\033[0m {}4-----------------------------4\033[0m\n".format(menu_elements['play3box'],menu_elements['play4box'])
+        return screenout
+
+    def draw_main_menu(gs):
+        clear_shell()
+        gs.compile_main_menu_elements()
+        menu_elements = gs.get_main_menu_elements()
+        screenout = ''
+        screenout += '\t\t\033[94m      || ||\033[92m ||\ ||  \033[91m// \\\\\n\033[0m'
+        screenout += '\t\t\033[94m      || ||\033[92m ||\\\|| \033[91m((   ))\n\033[0m'
+        screenout += '\t\t\033[94m      \\\ //\033[92m || \|| \033[91m \\\ //\n\033[0m'
+        screenout += '\033[97m===============================================================\033[0m\n'
+        if gs.get_player_num() > 4:
+            for line in menu_elements['playerList']:
+                screenout += line + '\n'
+        else:
+            screenout += draw_player_boxes(menu_elements)
         screenout += "\033[97m===============================================================\033[0m\n"
         screenout += "  {}\u2666---------------------------\u2666\033[0m \u2666===========================\u2666\n".format(menu_elements['beginBox'])
         screenout += "  {}|1.       Begin Match       |\033[0m |        High Scores        |\n".format(menu_elements['beginBox'])
         screenout += "  {}\u2666---------------------------\u2666\033[0m \u2666---------------------------\u2666\n".format(menu_elements['beginBox'])
-        screenout += "  {}\u2666---------------------------\u2666\033[0m |                           |\n".format(menu_elements['addBox'])
-        screenout += "  {}|2.       Add Player        |\033[0m |                           |\n".format(menu_elements['addBox'])
-        screenout += "  {}\u2666---------------------------\u2666\033[0m |                           |\n".format(menu_elements['addBox'])
-        screenout += "  {}\u2666---------------------------\u2666\033[0m |                           |\n".format(menu_elements['addBox'])
-        screenout += "  {}|3.      Add Computer       |\033[0m |                           |\n".format(menu_elements['addBox'])
-        screenout += "  {}\u2666---------------------------\u2666\033[0m |                           |\n".format(menu_elements['addBox'])
-        screenout += "  {}\u2666---------------------------\u2666\033[0m |                           |\n".format(menu_elements['removeBox'])
-        screenout += "  {}|4.      Remove Player      |\033[0m |                           |\n".format(menu_elements['removeBox'])
-        screenout += "  {}\u2666---------------------------\u2666\033[0m |                           |\n".format(menu_elements['removeBox'])
-        screenout += "  \033[97m\u2666---------------------------\u2666\033[0m |                           |\n"
-        screenout += "  \033[97m|5.        Settings         |\033[0m |                           |\n"
+        screenout += "  {}\u2666---------------------------\u2666\033[0m |{}|\n".format(menu_elements['addBox'], menu_elements['highScores'][0])
+        screenout += "  {}|2.       Add Player        |\033[0m |{}|\n".format(menu_elements['addBox'], menu_elements['highScores'][1])
+        screenout += "  {}\u2666---------------------------\u2666\033[0m |{}|\n".format(menu_elements['addBox'], menu_elements['highScores'][2])
+        screenout += "  {}\u2666---------------------------\u2666\033[0m |{}|\n".format(menu_elements['addBox'], menu_elements['highScores'][3])
+        screenout += "  {}|3.      Add Computer       |\033[0m |{}|\n".format(menu_elements['addBox'], menu_elements['highScores'][4])
+        screenout += "  {}\u2666---------------------------\u2666\033[0m |{}|\n".format(menu_elements['addBox'], menu_elements['highScores'][5])
+        screenout += "  {}\u2666---------------------------\u2666\033[0m |{}|\n".format(menu_elements['removeBox'], menu_elements['highScores'][6])
+        screenout += "  {}|4.      Remove Player      |\033[0m |{}|\n".format(menu_elements['removeBox'], menu_elements['highScores'][7])
+        screenout += "  {}\u2666---------------------------\u2666\033[0m |{}|\n".format(menu_elements['removeBox'], menu_elements['highScores'][8])
+        screenout += "  \033[97m\u2666---------------------------\u2666\033[0m \u2666---------------------------\u2666\n"
+        screenout += "  \033[97m|5.        Settings         |\033[0m {}|6.   Resume Saved Match    |\033[0m\n".format(menu_elements['resumeBox'])
         screenout += "  \033[97m\u2666---------------------------\u2666\033[0m \u2666===========================\u2666\n"
         screenout += "\033[97m===============================================================\033[0m\n"
         screenout += '\033[91m{}\033[0m'.format(gs.main_menu_error)
@@ -1532,6 +2846,2147 @@ def Uno(debugging=False):
     
     main_menu()
             
+def build_simulation_settings(players=2, reshuffle_pile=False, log_dir=None):
+    '''Returns GameSettings seated with 'players' ComputerPlayers for headless play,
+    saving a log of every match into 'log_dir' if given.'''
+    gs = GameSettings()
+    gs.computer_simulation = True
+    gs.display_effects = False
+    gs.reshuffle_pile = reshuffle_pile
+    gs.log_dir = log_dir
+    for i in range(players):
+        i #unused
+        gs.add_player(ComputerPlayer(gs.get_computer_name()))
+    return gs
+
+def simulate(players=2, n_games=1, seed=None, gs=None, reshuffle_pile=False, scores=None, record=False, stats=None, log_dir=None):
+    '''Plays 'n_games' computer-only matches with no screen output or input.
+
+    Returns a report dict with wins and points per player name, total turns
+    and throughput in games per second. Every match's ScoreStore rows are
+    written to 'scores' in one transaction at the end, and kept in the
+    report under 'results' if 'record' is set. Matches are also added to
+    the MatchStats 'stats', returned under 'stats'. Match seeds come from a
+    generator of its own seeded with 'seed', leaving the random module alone.'''
+    if not 2 <= players <= GameSettings.max_players:
+        raise BadInputError('Simulations Require 2 to {} Players'.format(GameSettings.max_players))
+    if gs == None:
+        gs = build_simulation_settings(players, reshuffle_pile, log_dir)
+    rng = random.Random(seed)
+    wins = {}
+    points_before = {}
+    for player in gs.player_staging:
+        wins[player.get_name()] = 0
+        points_before[player.get_name()] = player.get_points()
+    turns = 0
+    results = []
+    start = time.perf_counter()
+    for i in range(n_games):
+        i #unused
+        gs.finalize_players()
+        m = Match(gs, rng.getrandbits(32))
+        m.begin()
+        while (not m.is_complete()):
+            m.next_turn()
+            turns += 1
+        if gs.log_dir != None:
+            m.save_log(gs.log_dir)
+        wins[m.get_player(m.winner_id).get_name()] += 1
+        if scores != None or record:
+            results += ScoreStore.match_rows(m)
+        if stats != None:
+            stats.add_match(m)
+        gs = m.end(gs)
+    seconds = time.perf_counter() - start
+    points = {}
+    for player in gs.player_staging:
+        points[player.get_name()] = player.get_points() - points_before[player.get_name()]
+    if scores != None:
+        scores.record_many(results)
+    report = {
+        'games' : n_games,
+        'turns' : turns,
+        'seconds' : seconds,
+        'games_per_second' : n_games / seconds if seconds > 0 else 0.0,
+        'wins' : wins,
+        'points' : points,
+        }
+    if record:
+        report['results'] = results
+    if stats != None:
+        report['stats'] = stats
+    return report
+
+def merge_reports(reports):
+    '''Combines simulation reports, summing games, turns, wins and points.'''
+    merged = {'games':0, 'turns':0, 'seconds':0.0, 'games_per_second':0.0, 'wins':{}, 'points':{}}
+    for report in reports:
+        if 'results' in report:
+            merged.setdefault('results', []).extend(report['results'])
+        if 'stats' in report:
+            merged.setdefault('stats', MatchStats()).merge(report['stats'])
+        merged['games'] += report['games']
+        merged['turns'] += report['turns']
+        merged['seconds'] += report['seconds']
+        for name in report['wins']:
+            merged['wins'][name] = merged['wins'].get(name, 0) + report['wins'][name]
+            merged['points'][name] = merged['points'].get(name, 0) + report['points'][name]
+    if merged['seconds'] > 0:
+        merged['games_per_second'] = merged['games'] / merged['seconds']
+    return merged
+
+def shard_games(n_games, seed, shards):
+    '''Splits 'n_games' into (games, seed) shards. Shard seeds are drawn from a
+    generator seeded with 'seed', so nearby seeds give unrelated shards.'''
+    rng = random.Random(seed)
+    shards = max(1, min(shards, n_games))
+    size, extra = divmod(n_games, shards)
+    return [(size + (1 if index < extra else 0), rng.getrandbits(64)) for index in range(shards)]
+
+_worker_settings = None     #    Per-process GameSettings reused across shards
+_worker_record = False      #    Return ScoreStore rows with each shard's report
+_worker_stats = False       #    Return a MatchStats with each shard's report
+
+def _init_tournament_worker(players, reshuffle_pile=False, record=False, stats=False, log_dir=None):
+    global _worker_settings, _worker_record, _worker_stats
+    _worker_settings = build_simulation_settings(players, reshuffle_pile, log_dir)
+    _worker_record = record
+    _worker_stats = stats
+
+def _run_tournament_shard(shard):
+    games, seed = shard
+    return simulate(len(_worker_settings.player_staging), games, seed, _worker_settings, record=_worker_record,
+                    stats=MatchStats() if _worker_stats else None)
+
+def tournament(players=2, n_games=1000, seed=None, workers=None, shard_size=50, reshuffle_pile=False, scores=None, stats=None,
+               log_dir=None):
+    '''Shards 'n_games' computer-only matches across a process pool and merges the results.
+
+    'workers' defaults to the number of cores. Shards of 'shard_size' games
+    outnumber workers so that slow shards do not leave cores idle; every shard
+    is seeded independently, so the merged report depends only on the seed.
+    With a ScoreStore in 'scores' the shards send their rows back and the
+    parent writes them all in one transaction; with a MatchStats in 'stats'
+    each shard sends its own, merged into 'stats'. Workers save every
+    match's log into 'log_dir' if given.'''
+    if not 2 <= players <= GameSettings.max_players:
+        raise BadInputError('Simulations Require 2 to {} Players'.format(GameSettings.max_players))
+    if workers == None:
+        workers = os.cpu_count() or 1
+    shards = shard_games(n_games, seed, int(math.ceil(n_games / shard_size)))
+    start = time.perf_counter()
+    options = (players, reshuffle_pile, scores != None, stats != None, log_dir)
+    if workers == 1:
+        _init_tournament_worker(*options)
+        reports = [_run_tournament_shard(shard) for shard in shards]
+    else:
+        with multiprocessing.Pool(workers, _init_tournament_worker, options) as pool:
+            reports = pool.map(_run_tournament_shard, shards)
+    report = merge_reports(reports)
+    if scores != None:
+        scores.record_many(report.pop('results', []))
+    if stats != None:
+        report['stats'] = stats.merge(report.get('stats', MatchStats()))
+    report['seconds'] = time.perf_counter() - start
+    report['games_per_second'] = report['games'] / report['seconds'] if report['seconds'] > 0 else 0.0
+    report['workers'] = workers
+    return report
+
+def parse_address(address):
+    '''Turns 'host:port' into a TCP address tuple; anything else is a Unix socket path.'''
+    if isinstance(address, tuple):
+        return address
+    host, sep, port = address.rpartition(':')
+    if sep and port.isnumeric():
+        return (host or '127.0.0.1', int(port))
+    return address
+
+def send_message(stream, message):
+    stream.write((json.dumps(message)+'\n').encode())
+    stream.flush()
+
+def read_message(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError('Connection Closed')
+    return json.loads(line.decode())
+
+class SimulationCoordinator:
+    '''Hands out seeded batches of games to simulation workers over a socket.
+
+    The protocol is one JSON object per line. A worker sends {"op":"lease"} and
+    receives a "batch" (id, games, seed, players), a "wait" with a retry delay
+    while every batch is leased out, or "done". It answers with
+    {"op":"result","batch":id,"report":...}. Leases not completed within
+    'lease_timeout' seconds are handed out again; duplicate results are ignored.'''
+
+    def __init__(self, players=2, n_games=1000, seed=None, batch_size=50, lease_timeout=60.0, address=('127.0.0.1', 0)):
+        if not 2 <= players <= GameSettings.max_players:
+            raise BadInputError('Simulations Require 2 to {} Players'.format(GameSettings.max_players))
+        self.players = players
+        self.lease_timeout = lease_timeout
+        self.batches = dict(enumerate(shard_games(n_games, seed, int(math.ceil(n_games / batch_size)))))
+        self.pending = collections.deque(self.batches)
+        self.leases = {}                    #    Batch ID : Lease Expiry
+        self.results = {}                   #    Batch ID : Report
+        self.reissued = 0
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    while True:
+                        send_message(self.wfile, coordinator.handle_message(read_message(self.rfile)))
+                except (ConnectionError, ValueError, OSError):
+                    pass
+
+        address = parse_address(address)
+        if isinstance(address, tuple):
+            server_class = socketserver.ThreadingTCPServer
+        else:
+            server_class = socketserver.ThreadingUnixStreamServer
+        server_class.daemon_threads = True
+        server_class.allow_reuse_address = True
+        self.server = server_class(address, Handler)
+        self.address = self.server.server_address
+
+    def handle_message(self, message):
+        if message.get('op') == 'lease':
+            return self.lease()
+        elif message.get('op') == 'result':
+            self.complete(message['batch'], message['report'])
+            return {'op':'ok'}
+        return {'op':'error', 'error':'Unknown Operation'}
+
+    def lease(self):
+        with self.lock:
+            now = time.monotonic()
+            for batch_id, expiry in list(self.leases.items()):
+                if expiry <= now:
+                    del self.leases[batch_id]
+                    self.pending.append(batch_id)
+                    self.reissued += 1
+            if self.pending:
+                batch_id = self.pending.popleft()
+                self.leases[batch_id] = now + self.lease_timeout
+                games, seed = self.batches[batch_id]
+                return {'op':'batch', 'batch':batch_id, 'games':games, 'seed':seed, 'players':self.players}
+            if len(self.results) == len(self.batches):
+                return {'op':'done'}
+            return {'op':'wait', 'retry':min(1.0, self.lease_timeout / 4)}
+
+    def complete(self, batch_id, report):
+        with self.lock:
+            if batch_id in self.batches and batch_id not in self.results:
+                self.results[batch_id] = report
+                self.leases.pop(batch_id, None)
+                if batch_id in self.pending:
+                    self.pending.remove(batch_id)
+                if len(self.results) == len(self.batches):
+                    self.finished.set()
+
+    def run(self, timeout=None):
+        '''Serves workers until every batch has a result, then returns the merged report.'''
+        start = time.perf_counter()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            if not self.finished.wait(timeout):
+                raise TimeoutError('Simulation Batches Still Outstanding')
+        finally:
+            self.server.shutdown()
+            self.server.server_close()
+            if not isinstance(self.address, tuple) and os.path.exists(self.address):
+                os.unlink(self.address)
+        report = merge_reports([self.results[batch_id] for batch_id in sorted(self.results)])
+        report['seconds'] = time.perf_counter() - start
+        report['games_per_second'] = report['games'] / report['seconds'] if report['seconds'] > 0 else 0.0
+        report['reissued'] = self.reissued
+        return report
+
+def simulation_worker(address, connect_attempts=10):
+    '''Leases batches from a SimulationCoordinator and plays them headless until told it is done.
+
+    Returns the number of batches completed.'''
+    address = parse_address(address)
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    for attempt in range(connect_attempts):
+        try:
+            connection = socket.create_connection(address) if family == socket.AF_INET else socket.socket(family)
+            if family == socket.AF_UNIX:
+                connection.connect(address)
+            break
+        except OSError:
+            if attempt == connect_attempts - 1:
+                raise
+            time.sleep(0.2)
+    completed = 0
+    settings = {}                           #    Players : GameSettings
+    with connection, connection.makefile('rwb') as stream:
+        while True:
+            send_message(stream, {'op':'lease'})
+            reply = read_message(stream)
+            if reply['op'] == 'done':
+                return completed
+            elif reply['op'] == 'wait':
+                time.sleep(reply['retry'])
+            elif reply['op'] == 'batch':
+                players = reply['players']
+                if players not in settings:
+                    settings[players] = build_simulation_settings(players)
+                report = simulate(players, reply['games'], reply['seed'], settings[players])
+                send_message(stream, {'op':'result', 'batch':reply['batch'], 'report':report})
+                read_message(stream)
+                completed += 1
+
+def run_local_cluster(players=2, n_games=1000, seed=None, workers=None, batch_size=50, lease_timeout=60.0):
+    '''Runs a SimulationCoordinator with 'workers' worker processes on localhost.'''
+    if workers == None:
+        workers = os.cpu_count() or 1
+    coordinator = SimulationCoordinator(players, n_games, seed, batch_size, lease_timeout)
+    processes = [multiprocessing.Process(target=simulation_worker, args=(coordinator.address,), daemon=True) for i in range(workers)]
+    for process in processes:
+        process.start()
+    report = coordinator.run()
+    for process in processes:
+        process.join()
+    return report
+
+class ServerSession:
+    '''One client connection to a GameServer, read and written a line at a time.'''
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.name = None
+        self.room = None                    #    GameRoom seated at, None in the lobby
+
+    def send(self, text):
+        self.writer.write((text+'\r\n').encode())
+
+    async def read_line(self):
+        '''Returns the next line without its ending, or None once the client has gone.'''
+        try:
+            line = await self.reader.readline()
+        except (ConnectionError, OSError):
+            return None
+        if not line:
+            return None
+        return line.decode(errors='replace').strip()
+
+class GameRoom:
+    '''A table on a GameServer, seated like the main menu and played through Match.apply().
+
+    Nothing waits on input: a human's move is one line handed to play(), and
+    the computer turns that follow run straight after it, yielding to the
+    event loop between turns so other rooms keep moving.'''
+
+    def __init__(self, number):
+        self.number = number
+        self.settings = GameSettings()
+        self.settings.computer_simulation = True
+        self.settings.display_effects = False
+        self.sessions = {}                  #    Player Name : ServerSession
+        self.match = None
+        self.wild_index = None              #    Hand index of a wild waiting for its color
+        self.first_color = False            #    A wild first card waits for its color
+
+    def is_playing(self):
+        return self.match != None
+
+    def describe(self):
+        names = ', '.join(player.get_name() for player in self.settings.player_staging)
+        return 'Room {}: {} ({})'.format(self.number, names or 'empty', 'playing' if self.is_playing() else 'waiting')
+
+    def broadcast(self, text):
+        for session in self.sessions.values():
+            session.send(text)
+
+    def seat(self, session):
+        if not self.settings.can_add_player():
+            raise BadInputError('Max Number of Players Reached')
+        self.settings.add_player(Player(session.name))
+        self.sessions[session.name] = session
+        session.room = self
+        self.broadcast('{} joined room {}.'.format(session.name, self.number))
+
+    def add_computer(self):
+        if not self.settings.can_add_player():
+            raise BadInputError('Max Number of Players Reached')
+        player = ComputerPlayer(self.settings.get_computer_name())
+        self.settings.add_player(player)
+        self.broadcast('{} joined room {}.'.format(player.get_name(), self.number))
+
+    def remove_player(self, number):
+        if not 0 < number <= self.settings.get_player_num():
+            raise BadInputError('Invalid Player Number!')
+        name = self.settings.player_staging[number-1].get_name()
+        if name in self.sessions:
+            self.leave(self.sessions[name])
+        else:
+            self.settings.remove_player(number)
+            self.broadcast('{} left room {}.'.format(name, self.number))
+
+    def leave(self, session):
+        '''Unseats a human; leaving mid-match ends the match without a winner.'''
+        if self.is_playing():
+            self.match.match_abort = True
+            self.match.match_complete = True
+            self.finish()
+        del self.sessions[session.name]
+        session.room = None
+        for number, player in enumerate(self.settings.player_staging, 1):
+            if player.get_name() == session.name:
+                self.settings.remove_player(number)
+                break
+        session.send('You left room {}.'.format(self.number))
+        self.broadcast('{} left room {}.'.format(session.name, self.number))
+
+    async def begin(self):
+        if not self.settings.can_begin():
+            raise BadInputError('Two Players Required to Begin')
+        self.settings.finalize_players()
+        self.match = Match(self.settings)
+        self.match.start(ask=False)
+        self.broadcast('Match begins. First turn will be {}.'.format(self.current_player().get_name()))
+        if self.match.event == 'wild':
+            player = self.current_player()
+            if player.get_type() == 'Computer':
+                self.match.name_first_color(player.get_wild_color(self.match))
+            else:
+                self.first_color = True
+                self.prompt()
+                return
+        await self.run_computers()
+
+    def current_player(self):
+        return self.match.players[self.match.turn]
+
+    def status(self):
+        m = self.match
+        tables = ', '.join('{} {}'.format(m.players[identity].get_name(), m.players[identity].get_card_num())
+                           for identity in m.turn_list)
+        return 'Pile: {}, color {}. Deck: {}. Cards: {}.'.format(m.pile[0].describe(), m.current_color.title(), len(m.deck), tables)
+
+    def prompt(self):
+        '''Shows the player on turn their hand and what they may enter; the rest are told to wait.'''
+        player = self.current_player()
+        session = self.sessions[player.get_name()]
+        for other in self.sessions.values():
+            if other != session:
+                other.send("{}'s turn.".format(player.get_name()))
+        session.send(self.status())
+        if self.first_color or self.wild_index != None:
+            session.send('Wild Card! Specify a Color: (B)lue, (R)ed, (G)reen, (Y)ellow')
+            return
+        session.send('Your hand: '+'  '.join('{}:{}'.format(index, card.describe()) for index, card in enumerate(player.hand)))
+        options = ['a card number']
+        actions = self.match.legal_actions()
+        if MOVE_DRAW in actions:
+            options.append('(D)raw')
+        if MOVE_PASS in actions:
+            options.append('(S) to pass')
+        session.send('Your turn. Enter {}.'.format(', '.join(options)))
+
+    async def play(self, session, line):
+        '''Takes 'line' as the move of the human on turn, then plays the computer turns after it.'''
+        m = self.match
+        player = self.current_player()
+        if player.get_name() != session.name:
+            session.send("Waiting for {}.".format(player.get_name()))
+            return
+        if self.first_color or self.wild_index != None:
+            checked = m.check_color_input(line)
+            if not checked['valid']:
+                session.send('Specify A Color')
+                return
+            color = checked['entry']
+            if self.first_color:
+                self.first_color = False
+                m.name_first_color(color)
+                self.broadcast('{} named {}.'.format(player.get_name(), color.title()))
+            else:
+                card = player.hand.get_card(self.wild_index)
+                self.wild_index = None
+                self.apply(SearchState.encode(card.code, Deck.colors.index(color)), player, card)
+        else:
+            entry = line.lower()[:1]
+            actions = m.legal_actions()
+            if entry == 'd' and MOVE_DRAW in actions:
+                self.apply(MOVE_DRAW, player)
+            elif entry == 's' and MOVE_PASS in actions:
+                self.apply(MOVE_PASS, player)
+            elif line.isnumeric() and int(line) < player.get_card_num():
+                card = player.hand.get_card(int(line))
+                if card.code not in (SearchState.decode(action)[0] for action in actions if action < MOVE_DRAW):
+                    session.send("Card Doesn't Match The Color {} or Value {}!".format(m.current_color, m.current_value))
+                    return
+                if card.is_wild():
+                    self.wild_index = int(line)
+                    self.prompt()
+                    return
+                self.apply(card.code, player, card)
+            else:
+                session.send('{} is not a valid selection.'.format(line))
+                return
+        await self.run_computers()
+
+    def apply(self, action, player, card=None):
+        '''Applies 'action' for 'player' and tells the room what happened.'''
+        self.match.apply(action)
+        if action == MOVE_DRAW:
+            self.broadcast('{} drew a card.'.format(player.get_name()))
+        elif action == MOVE_PASS:
+            self.broadcast('{} passed.'.format(player.get_name()))
+        elif card.is_wild():
+            self.broadcast('{} played {}, naming {}.'.format(player.get_name(), card.describe(), self.match.current_color.title()))
+        else:
+            self.broadcast('{} played {}.'.format(player.get_name(), card.describe()))
+
+    async def run_computers(self):
+        '''Plays computer turns until a human is on turn or the match is over.'''
+        m = self.match
+        while not m.is_complete() and self.current_player().get_type() == 'Computer':
+            player = self.current_player()
+            action = player.choose_action(m)
+            card = None
+            if action < MOVE_DRAW:
+                card = player.hand.get_card(player.index_code(SearchState.decode(action)[0]))
+            self.apply(action, player, card)
+            await asyncio.sleep(0)
+        if m.is_complete():
+            self.finish()
+        else:
+            self.prompt()
+
+    def finish(self):
+        '''Tallies the points as Match.end() does and returns the room to its lobby.'''
+        m = self.match
+        self.match = None
+        self.wild_index = None
+        self.first_color = False
+        if m.match_abort:
+            m.end(self.settings)
+            self.broadcast('Match ended without a winner.')
+            return
+        winner = m.players[m.winner_id]
+        points = winner.get_points()
+        m.end(self.settings)
+        self.broadcast('{} Won {} Points!'.format(winner.get_name(), winner.get_points() - points))
+        self.broadcast(self.describe())
+
+class GameServer:
+    '''Hosts GameRooms for line based clients, such as telnet or nc, on one asyncio loop.
+
+    A client names itself, then uses the lobby commands below. Clients
+    waiting to type cost a suspended coroutine each and computer turns are
+    run cooperatively, so one core can host hundreds of tables.'''
+
+    lobby_help = ('Commands: (L)ist rooms, (C)reate room, (J)oin <room>, (A)dd computer,',
+                  '(R)emove <player number>, (B)egin match, l(E)ave room, (H)elp, (Q)uit.')
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        self.address = parse_address(address)
+        self.rooms = {}                     #    Room Number : GameRoom
+        self.room_count = 0
+        self.names = set()                  #    Names in use, kept unique as add_player does
+        self.server = None
+
+    async def start(self):
+        '''Starts listening and returns the bound address.'''
+        if isinstance(self.address, tuple):
+            self.server = await asyncio.start_server(self.handle, *self.address)
+        else:
+            self.server = await asyncio.start_unix_server(self.handle, self.address)
+        self.address = self.server.sockets[0].getsockname()
+        return self.address
+
+    async def serve(self):
+        if self.server == None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if not isinstance(self.address, tuple) and os.path.exists(self.address):
+                os.unlink(self.address)
+
+    async def handle(self, reader, writer):
+        session = ServerSession(reader, writer)
+        try:
+            if await self.ask_name(session):
+                for line in self.lobby_help:
+                    session.send(line)
+                while True:
+                    line = await session.read_line()
+                    if line == None or not await self.dispatch(session, line):
+                        break
+                    await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            if session.room != None:
+                self.leave(session)
+            self.names.discard(session.name)
+            writer.close()
+
+    async def ask_name(self, session):
+        '''Reads a name under the rules of the main menu's add_player; False if the client left.'''
+        while True:
+            session.send("Please Enter Your Name: ")
+            name = await session.read_line()
+            if name == None:
+                return False
+            name = name.title()
+            if len(name) > 11:
+                session.send("Name Must Be 11 Characters or Less!")
+            elif len(name) == 0:
+                continue
+            elif name in self.names or name in GameSettings.computer_names:
+                session.send("Name Cannot Match Another Player's Name!")
+            else:
+                session.name = name
+                self.names.add(name)
+                return True
+
+    async def dispatch(self, session, line):
+        '''Runs a lobby command or hands a move to the room's match; False to disconnect.'''
+        room = session.room
+        command, sep, argument = line.partition(' ')
+        command = command.lower()[:1]
+        if command == 'q':
+            return False
+        if room != None and room.is_playing() and command != 'e':
+            await room.play(session, line)
+            return True
+        try:
+            if command == 'l':
+                for listed in self.rooms.values():
+                    session.send(listed.describe())
+                if not self.rooms:
+                    session.send('No rooms yet.')
+            elif command == 'c':
+                self.require_lobby(session)
+                self.room_count += 1
+                self.rooms[self.room_count] = GameRoom(self.room_count)
+                self.rooms[self.room_count].seat(session)
+            elif command == 'j':
+                self.require_lobby(session)
+                number = self.read_number(argument, 'Please Enter the Room Number')
+                if number not in self.rooms or self.rooms[number].is_playing():
+                    raise BadInputError('Room {} Cannot Be Joined'.format(number))
+                self.rooms[number].seat(session)
+            elif command in ('a', 'r', 'b', 'e'):
+                if room == None:
+                    raise BadInputError('Create or Join a Room First')
+                if command == 'a':
+                    room.add_computer()
+                elif command == 'r':
+                    room.remove_player(self.read_number(argument, 'Please Enter the Player Number, not Name!'))
+                    self.close_empty(room)
+                elif command == 'b':
+                    await room.begin()
+                else:
+                    self.leave(session)
+            elif command == 'h':
+                for help_line in self.lobby_help:
+                    session.send(help_line)
+            else:
+                raise BadInputError('{} is not a valid selection.'.format(line))
+        except BadInputError as error:
+            session.send(str(error))
+        return True
+
+    def require_lobby(self, session):
+        if session.room != None:
+            raise BadInputError('Leave Room {} First'.format(session.room.number))
+
+    def read_number(self, argument, message):
+        if not argument.strip().isnumeric():
+            raise BadInputError(message)
+        return int(argument)
+
+    def leave(self, session):
+        room = session.room
+        room.leave(session)
+        self.close_empty(room)
+
+    def close_empty(self, room):
+        '''Closes a room once no human is seated in it.'''
+        if not room.sessions:
+            self.rooms.pop(room.number, None)
+
+class BatchSimulator:
+    '''Plays many computer-only matches in lockstep on NumPy arrays.
+
+    Hands are (games, players, card code) count arrays, decks are per-game
+    permutations of a Deck.shoe_size() shoe of card codes drawn from the end,
+    and the pile is reduced to the top card code, color and value. step()
+    advances every unfinished game by one next_turn, applying the
+    Match.place_card/next_turn rules and the ComputerPlayer.think/get_wild_color
+    heuristics vectorized across games; the exact endgame (EndgameSolver) and
+    pile reshuffling are not modelled. check_batch_equivalence() replays object
+    matches through it turn by turn.'''
+
+    hand_size = 7
+
+    def __init__(self, players=2, n_games=1000, seed=None, source=None):
+        if np == None:
+            raise BadInputError('Batch Simulation Requires NumPy')
+        if not 2 <= players <= GameSettings.max_players:
+            raise BadInputError('Simulations Require 2 to {} Players'.format(GameSettings.max_players))
+        self.players = players
+        self.n_games = n_games
+        self.rng = np.random.default_rng(seed)
+        self.source = source                #    Replayed random draws, see check_batch_equivalence
+        if not hasattr(BatchSimulator, 'legal'):
+            BatchSimulator.build_tables()
+        self.decks = Deck.shoe_size(players)
+        self.shoe = np.tile(self.base_deck, self.decks)                 #    Unshuffled shoe, as Deck builds it
+        self.shoe_colors = self.base_deck_colors * self.decks
+
+    @classmethod
+    def build_tables(cls):
+        values = Deck.values + ('W','+4')
+        cls.color_of = np.array([Deck.colors.index(color) if color != 'wild' else 4 for color, value in CARD_FACES])
+        cls.value_of = np.array([values.index(value) for color, value in CARD_FACES])
+        cls.points = np.array([Card(color, value).get_points() for color, value in CARD_FACES])
+        cls.legal = np.zeros((len(Deck.colors), len(values), len(CARD_FACES)), dtype=bool)
+        for color_index, color in enumerate(Deck.colors):
+            for value_index, value in enumerate(values):
+                for code in iter_codes(LEGAL_MASKS[(color, value)]):
+                    cls.legal[color_index, value_index, code] = True
+        cls.skip_codes = cls.value_of == values.index('X')
+        cls.reverse_codes = cls.value_of == values.index('R')
+        cls.base_deck = np.repeat(np.arange(len(CARD_COPIES)), CARD_COPIES).astype(np.int8)
+        cls.base_deck_colors = np.bincount(cls.color_of[cls.base_deck], minlength=5)
+        ### Colors are Deck.colors indices; these match the tuples random.choice is given ###
+        cls.hand_color_order = np.array([0, 3, 2, 1, 4])        #    Hand.color_counts order: red, blue, green, yellow, wild
+        cls.forced_wild_colors = np.array([0, 3, 2, 1])         #    ('r','b','g','y')
+
+    def random_integers(self, highs):
+        '''Returns one integer in [0, high) for each entry of 'highs'.'''
+        if self.source != None:
+            return np.array([self.source.popleft() for high in highs], dtype=np.int64)
+        return self.rng.integers(0, highs)
+
+    def reset(self, decks=None):
+        '''Shuffles (or takes) one deck per game, deals, and places the first card like Match.begin.'''
+        n, p = self.n_games, self.players
+        self.deck = np.zeros((n, len(self.shoe)), dtype=np.int8)
+        self.deck_len = np.zeros(n, dtype=np.int64)
+        self.hands = np.zeros((n, p, len(CARD_FACES)), dtype=np.int16)
+        self.color = np.zeros(n, dtype=np.int64)
+        self.value = np.zeros(n, dtype=np.int64)
+        self.top = np.zeros(n, dtype=np.int64)
+        self.direction = np.ones(n, dtype=np.int64)
+        self.draw_amount = np.zeros(n, dtype=np.int64)
+        self.passes = np.zeros(n, dtype=np.int64)
+        self.skip = np.zeros(n, dtype=bool)
+        self.force = np.zeros((n, p), dtype=np.int64)
+        self.drew = np.zeros((n, p), dtype=bool)
+        self.voids = np.zeros((n, p, len(Deck.colors)), dtype=bool)     #    CardTracker.voids
+        self.unseen_colors = np.zeros((n, len(Deck.colors)), dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        self.winner = np.full(n, -1, dtype=np.int64)
+        self.turns = np.zeros(n, dtype=np.int64)
+        self.turn = np.zeros(n, dtype=np.int64)
+        self.deal(np.arange(n), decks)
+
+    def deal(self, games, decks=None):
+        '''Starts the given games over from a fresh shuffled (or given) deck.'''
+        n = len(games)
+        if decks == None:
+            decks = self.rng.permuted(np.tile(self.shoe, (n, 1)), axis=1)
+        self.deck[games] = np.array(decks, dtype=np.int8).reshape(n, -1)
+        self.deck_len[games] = self.deck.shape[1]
+        for field in (self.hands, self.color, self.value, self.top, self.draw_amount, self.passes, self.skip,
+                      self.force, self.drew, self.voids, self.done, self.turns):
+            field[games] = 0
+        self.direction[games] = 1
+        self.winner[games] = -1
+        self.unseen_colors[games] = self.shoe_colors[:len(Deck.colors)]
+        for seat in range(self.players):
+            for i in range(self.hand_size):
+                i #unused
+                self.draw(games, np.full(n, seat))
+        self.voids[games] = False
+        self.turn[games] = self.random_integers(np.full(n, self.players))
+        self.place(games, self.turn[games], self.draw_top(games))
+
+    def draw_top(self, games):
+        self.deck_len[games] -= 1
+        return self.deck[games, self.deck_len[games]].astype(np.int64)
+
+    def draw(self, games, seats):
+        '''Deals the top card of each game's deck into the given seat's hand.'''
+        codes = self.draw_top(games)
+        self.hands[games, seats, codes] += 1
+        forced = self.force[games, seats] > 0
+        self.force[games, seats] -= forced
+        self.drew[games, seats] = ~forced
+        self.voids[games, seats] = False
+        self.voids[games, seats, self.color[games]] = ~forced
+
+    def place(self, games, seats, codes, chosen=None):
+        '''Match.place_card plus the reverse and wild events that follow it in the same turn.
+        Wilds take the Deck.colors index in 'chosen' when given, else the seat's heuristic choice.'''
+        self.top[games] = codes
+        colors = self.color_of[codes]
+        values = self.value_of[codes]
+        wild = colors == 4
+        self.value[games] = values
+        self.color[games] = np.where(wild, self.color[games], colors)
+        self.skip[games] = self.skip_codes[codes] | (self.reverse_codes[codes] & (self.players == 2))
+        self.draw_amount[games] = np.where(values == 14, 4, np.where(values == 12, 2, self.draw_amount[games]))
+        self.passes[games] = 0
+        self.unseen_colors[games[~wild], colors[~wild]] -= 1
+        self.voids[games[~wild], seats[~wild], colors[~wild]] = False
+        reverse = self.reverse_codes[codes] & (self.players > 2)
+        self.direction[games[reverse]] *= -1
+        if wild.any():
+            chosen = self.wild_color(games[wild], seats[wild]) if chosen is None else chosen[wild]
+            self.color[games[wild]] = chosen
+            self.voids[games[wild], seats[wild], chosen] = False
+
+    def wild_color(self, games, seats):
+        '''ComputerPlayer.get_wild_color for each seat: most held color, or if wilds lead the
+        first color the next seat is void in, else the color with the fewest cards out.'''
+        hands = self.hands[games, seats]
+        counts = np.zeros((len(games), 5), dtype=np.int64)
+        for color in range(5):
+            counts[:, color] = hands[:, self.color_of == color].sum(axis=1)
+        best = self.hand_color_order[counts[:, self.hand_color_order].argmax(axis=1)]
+        wild = best == 4
+        if wild.any():
+            games, seats, counts = games[wild], seats[wild], counts[wild]
+            voids = self.voids[games, (seats + self.direction[games]) % self.players]
+            remaining = self.unseen_colors[games] - counts[:, :4]
+            best[wild] = np.where(voids.any(axis=1), voids.argmax(axis=1), remaining.argmin(axis=1))
+        return best
+
+    def think(self, games, seats, legal):
+        '''ComputerPlayer.think for games whose seat can play; returns the card code played.'''
+        n = len(games)
+        hands = self.hands[games, seats]
+        color = self.color[games]
+        has_legal = legal.any(axis=1)
+        codes = np.where(has_legal, -1, np.where(hands[:, DRAW_FOUR_CODE] > 0, DRAW_FOUR_CODE, WILD_CODE))
+
+        same_color = self.color_of[None, :] == color[:, None]
+        value_change = legal & ~same_color
+        skips = legal & (self.skip_codes | self.reverse_codes)
+        if self.players == 2:
+            shed = has_legal & (legal & self.skip_codes).any(axis=1)
+            codes = np.where(shed, skips.argmax(axis=1), codes)
+        reverses = legal & self.reverse_codes & same_color
+        previous = (seats - self.direction[games]) % self.players
+        reverse = has_legal & (legal & self.reverse_codes).any(axis=1) & self.drew[games, previous] & reverses.any(axis=1)
+        codes = np.where(reverse, reverses.argmax(axis=1), codes)
+
+        color_counts = np.zeros((n, 4), dtype=np.int64)
+        for c in range(4):
+            color_counts[:, c] = hands[:, self.color_of == c].sum(axis=1)
+        eligible = np.zeros((n, 4), dtype=bool)
+        for c in range(4):
+            eligible[:, c] = (value_change & (self.color_of == c)).any(axis=1)
+        best = np.where(eligible, color_counts, -1).argmax(axis=1)
+        rows = np.arange(n)
+        next_void = self.voids[games, (seats + self.direction[games]) % self.players, color]
+        better = (color_counts[rows, best] > color_counts[rows, color]) & ~next_void
+        change = has_legal & eligible.any(axis=1) & (better | (value_change == legal).all(axis=1))
+        best_cards = value_change & (self.color_of[None, :] == best[:, None])
+        codes = np.where(change, best_cards.argmax(axis=1), codes)
+
+        remaining = codes == -1
+        if remaining.any():
+            weights = np.where(legal & ~value_change, hands, 0)[remaining]
+            cumulative = weights.cumsum(axis=1)
+            choice = self.random_integers(cumulative[:, -1])
+            codes[remaining] = (cumulative > choice[:, None]).argmax(axis=1)
+        return codes
+
+    def step(self):
+        '''Runs one Match.next_turn in every unfinished game; returns False once all are done.'''
+        games = np.nonzero(~self.done)[0]
+        if len(games) == 0:
+            return False
+        self.take_turns(self.start_turns(games))
+        self.turn[games] = (self.turn[games] + self.direction[games]) % self.players
+        return True
+
+    def start_turns(self, games):
+        '''Begins the turn in each game: skips, then deals pending draws. Returns the games not skipped.'''
+        self.turns[games] += 1
+        seats = self.turn[games]
+        self.drew[games, seats] = False
+        skipped = self.skip[games]
+        self.skip[games] = False
+        playing = games[~skipped]
+        forced = self.draw_amount[playing] > 0
+        self.force[playing[forced], self.turn[playing[forced]]] += self.draw_amount[playing[forced]]
+        self.draw_amount[playing] = 0
+
+        pending = playing[(self.force[playing, self.turn[playing]] > 0) & (self.deck_len[playing] > 0)]
+        while len(pending):
+            self.draw(pending, self.turn[pending])
+            pending = pending[(self.force[pending, self.turn[pending]] > 0) & (self.deck_len[pending] > 0)]
+        return playing
+
+    def take_turns(self, games):
+        '''Has the seat on turn in each game draw until it can play, then play or pass.'''
+        pending = games
+        while len(pending):
+            seats = self.turn[pending]
+            hands = self.hands[pending, seats]
+            legal = (hands > 0) & self.legal[self.color[pending], self.value[pending]]
+            has_legal = legal.any(axis=1)
+            playable = has_legal | (hands[:, WILD_CODE] > 0) | (hands[:, DRAW_FOUR_CODE] > 0)
+            players = pending[playable]
+            if len(players):
+                self.play(players, self.turn[players], legal[playable])
+            stuck = pending[~playable]
+            passers = stuck[self.deck_len[stuck] == 0]
+            if len(passers):
+                self.pass_turn(passers)
+            pending = stuck[self.deck_len[stuck] > 0]
+            if len(pending):
+                self.draw(pending, self.turn[pending])
+
+    def play(self, games, seats, legal):
+        codes = self.think(games, seats, legal)
+        self.hands[games, seats, codes] -= 1
+        won = self.hands[games, seats].sum(axis=1) == 0
+        self.done[games[won]] = True
+        self.winner[games[won]] = seats[won]
+        recolor = self.color_of[codes] != self.color[games]
+        self.drew[games[recolor]] = False
+        self.place(games, seats, codes)
+
+    def pass_turn(self, games):
+        self.force[games, self.turn[games]] = 0
+        self.passes[games] += 1
+        forced = games[self.passes[games] == self.players]
+        if len(forced):
+            self.color[forced] = self.forced_wild_colors[self.random_integers(np.full(len(forced), 4))]
+            self.passes[forced] = 0
+
+    def run(self):
+        '''Plays every game to the end and returns a report like simulate().'''
+        start = time.perf_counter()
+        self.reset()
+        while self.step():
+            pass
+        seconds = time.perf_counter() - start
+        hand_points = (self.hands * self.points).sum(axis=2)
+        names = GameSettings.computer_names[:self.players]
+        wins, points = {}, {}
+        for seat, name in enumerate(names):
+            won = self.winner == seat
+            wins[name] = int(won.sum())
+            points[name] = int(hand_points[won].sum())
+        return {
+            'games' : self.n_games,
+            'turns' : int(self.turns.sum()),
+            'seconds' : seconds,
+            'games_per_second' : self.n_games / seconds if seconds > 0 else 0.0,
+            'wins' : wins,
+            'points' : points,
+            }
+
+class _RecordingRandom:
+    '''Stand-in for random.Random that logs every choice as an integer to 'log' (a deque).'''
+
+    def __init__(self, generator, log):
+        self.random = generator
+        self.log = log
+
+    def shuffle(self, x):
+        self.random.shuffle(x)
+
+    def choice(self, seq):
+        index = self.random.randrange(len(seq))
+        self.log.append(index)
+        return seq[index]
+
+    def randrange(self, stop):
+        value = self.random.randrange(stop)
+        self.log.append(value)
+        return value
+
+def check_batch_equivalence(players=2, n_games=20, seed=0):
+    '''Plays object matches and BatchSimulator games side by side and compares them every turn.
+
+    The batch engine is handed each match's deck and replays its random
+    draws, so any difference in rules shows up as a state mismatch.
+    Returns the number of turns compared.'''
+    values = Deck.values + ('W','+4')
+    compared = 0
+    for game in range(n_games):
+        gs = build_simulation_settings(players)
+        for player in gs.player_staging:
+            player.endgame_cards = 0            #    The batch engine plays the heuristic to the end
+        gs.finalize_players()
+        m = Match(gs, seed + game)
+        log = collections.deque()
+        m.rng = _RecordingRandom(m.rng, log)
+        m.ai_rng = _RecordingRandom(m.ai_rng, log)
+        batch = BatchSimulator(players, 1, source=log)
+        deck = [card.code for card in m.deck]
+        m.begin()
+        batch.reset([deck])
+        while True:
+            seats = [m.get_player(identity) for identity in m.turn_list]
+            state = {
+                'hands' : [list(player.hand.counts) for player in seats],
+                'deck' : [card.code for card in m.deck],
+                'color' : Deck.colors.index(m.current_color),
+                'value' : values.index(m.current_value),
+                'turn' : m.seat_index[m.turn],
+                'direction' : -1 if m.reverse else 1,
+                'draw_amount' : m.draw_amount,
+                'passes' : m.passes,
+                'skip' : m.event == 'skip',
+                'force' : [player.get_force_draws() for player in seats],
+                'drew' : [player.did_draw() for player in seats],
+                'voids' : [[m.tracker.is_void(identity, color) for color in Deck.colors] for identity in m.turn_list],
+                'unseen_colors' : [m.tracker.unseen_colors[color] for color in Deck.colors],
+                'winner' : m.seat_index[m.winner_id] if m.is_complete() else -1,
+                }
+            batch_state = {
+                'hands' : batch.hands[0].tolist(),
+                'deck' : batch.deck[0, :batch.deck_len[0]].tolist(),
+                'color' : int(batch.color[0]),
+                'value' : int(batch.value[0]),
+                'turn' : int(batch.turn[0]),
+                'direction' : int(batch.direction[0]),
+                'draw_amount' : int(batch.draw_amount[0]),
+                'passes' : int(batch.passes[0]),
+                'skip' : bool(batch.skip[0]),
+                'force' : batch.force[0].tolist(),
+                'drew' : batch.drew[0].tolist(),
+                'voids' : batch.voids[0].tolist(),
+                'unseen_colors' : batch.unseen_colors[0].tolist(),
+                'winner' : int(batch.winner[0]),
+                }
+            if m.is_complete():
+                if state['winner'] != batch_state['winner'] or state['hands'] != batch_state['hands']:
+                    raise RuntimeError('Batch Engine Diverged at End of Game {}'.format(game))
+                break
+            for key in state:
+                if state[key] != batch_state[key]:
+                    raise RuntimeError('Batch Engine Diverged in Game {}, Turn {}: {} {} != {}'.format(
+                        game, compared, key, batch_state[key], state[key]))
+            m.next_turn()
+            batch.step()
+            compared += 1
+            if len(log):
+                raise RuntimeError('Batch Engine Skipped Random Draws in Game {}'.format(game))
+    return compared
+
+### Information Set Search ###
+#   Search moves are ints: colored card codes as they are, then every wild
+#   code once per Deck.colors index it can name, 52 + (code-52)*4 + color.
+#   Match.apply() also takes MOVE_DRAW and MOVE_PASS.
+SEARCH_VALUES = Deck.values + ('W','+4')
+MOVE_DRAW = 60
+MOVE_PASS = 61
+SEARCH_LEGAL = tuple(LEGAL_MASKS[(color, value)] for color in Deck.colors for value in SEARCH_VALUES)
+
+class SearchState:
+    '''Copyable match state in card codes, advanced one move at a time.
+
+    Seats are Match.turn_list indices. A state always rests on a seat with a
+    card it may play, or on a winner: apply() plays a move, then runs the
+    skips, forced draws, draws and passes of the following turns the way
+    Match.next_turn does for ComputerPlayers.'''
+
+    __slots__ = ('counts', 'masks', 'sizes', 'deck', 'color', 'value', 'turn', 'step',
+                 'skip', 'draw_amount', 'passes', 'zero_change', 'winner')
+
+    def __init__(self, counts, deck, color, value, turn, step=1, passes=0, zero_change=False):
+        self.counts = counts                #    Per seat, copies held of each card code
+        self.masks = [sum(1 << code for code, count in enumerate(held) if count) for held in counts]
+        self.sizes = [sum(held) for held in counts]
+        self.deck = deck                    #    Card codes, drawn from the end
+        self.color = color                  #    Deck.colors index
+        self.value = value                  #    SEARCH_VALUES index
+        self.turn = turn
+        self.step = step                    #    -1 when turn order is reversed
+        self.skip = False
+        self.draw_amount = 0
+        self.passes = passes
+        self.zero_change = zero_change
+        self.winner = None
+
+    @classmethod
+    def sample(cls, observation, rng):
+        '''Returns a state consistent with an observation from SearchComputerPlayer.observe.
+
+        Cards neither in the observer's hand nor on the pile are shuffled and
+        dealt to the other seats by hand size, avoiding the colors a seat is
+        known not to hold where possible; the rest make up the deck.'''
+        hand, pile, sizes, seat, color, value, step, passes, zero_change, voids, decks = observation
+        unseen = [copies*decks for copies in CARD_COPIES]
+        for code in hand + pile:
+            unseen[code] -= 1
+        pool = [code for code, count in enumerate(unseen) for i in range(count)]
+        rng.shuffle(pool)
+        hands = {seat : hand}
+        for other, size in enumerate(sizes):
+            if other != seat and voids[other]:
+                dealt, rest = [], []
+                for code in pool:
+                    if len(dealt) < size and (code >= WILD_CODE or not voids[other] >> (code // 13) & 1):
+                        dealt.append(code)
+                    else:
+                        rest.append(code)
+                pool = rest
+                hands[other] = dealt
+        for other, size in enumerate(sizes):
+            if other == seat:
+                continue
+            dealt = hands.setdefault(other, [])
+            missing = size - len(dealt)
+            if missing:
+                dealt += pool[len(pool)-missing:]
+                del pool[len(pool)-missing:]
+        counts = []
+        for other in range(len(sizes)):
+            held = [0]*len(CARD_FACES)
+            for code in hands[other]:
+                held[code] += 1
+            counts.append(held)
+        return cls(counts, pool, color, value, seat, step, passes, zero_change)
+
+    @staticmethod
+    def moves(mask):
+        '''Returns the search moves for a mask of playable card codes.'''
+        moves = []
+        for code in iter_codes(mask):
+            if code < WILD_CODE:
+                moves.append(code)
+            else:
+                first = WILD_CODE + (code - WILD_CODE)*4
+                moves.extend(range(first, first + 4))
+        return moves
+
+    @staticmethod
+    def encode(code, color=0):
+        '''Returns the search move playing card 'code', naming the Deck.colors index 'color' for a wild.'''
+        if code < WILD_CODE:
+            return code
+        return WILD_CODE + (code - WILD_CODE)*4 + color
+
+    @staticmethod
+    def decode(move):
+        '''Returns (card code, color, value) indices for a search move.'''
+        if move < WILD_CODE:
+            return move, move // 13, move % 13
+        code = WILD_CODE + (move - WILD_CODE) // 4
+        return code, (move - WILD_CODE) % 4, code - WILD_CODE + 13
+
+    @staticmethod
+    def playable_mask(mask, color, value, zero_change=False):
+        '''Returns the codes in 'mask' playable on 'color' and 'value' indices, as Player.get_legal_cards.'''
+        legal = mask & SEARCH_LEGAL[color*15 + value]
+        zeros = 0
+        if zero_change:
+            zeros = mask & ZERO_MASK
+            legal &= ~ZERO_MASK
+        if legal:
+            return legal | zeros | (mask & WILD_MASK)
+        return zeros | (mask & (WILD_MASK | DRAW_FOUR_MASK))
+
+    def playable(self, seat):
+        return self.playable_mask(self.masks[seat], self.color, self.value, self.zero_change)
+
+    def actions(self):
+        return self.moves(self.playable(self.turn))
+
+    def draw(self, seat):
+        code = self.deck.pop()
+        self.counts[seat][code] += 1
+        self.masks[seat] |= 1 << code
+        self.sizes[seat] += 1
+
+    def apply(self, move, rng):
+        '''Plays 'move' for the seat on turn, then advances to the next seat that can play.'''
+        seat = self.turn
+        code, color, value = self.decode(move)
+        held = self.counts[seat]
+        held[code] -= 1
+        if not held[code]:
+            self.masks[seat] &= ~(1 << code)
+        self.sizes[seat] -= 1
+        if not self.sizes[seat]:
+            self.winner = seat
+            return
+        self.color = color
+        self.value = value
+        self.passes = 0
+        players = len(self.sizes)
+        if value == 10 or (value == 11 and players == 2):
+            self.skip = True
+        elif value == 11:
+            self.step = -self.step
+        elif value == 12:
+            self.draw_amount = 2
+        elif value == 14:
+            self.draw_amount = 4
+        self.turn = (seat + self.step) % players
+        self.settle(rng)
+
+    def settle(self, rng):
+        '''Plays out turns needing no decision until the seat on turn can play.'''
+        players = len(self.sizes)
+        deck = self.deck
+        while True:
+            seat = self.turn
+            if self.skip:
+                self.skip = False
+            else:
+                for i in range(min(self.draw_amount, len(deck))):
+                    i #unused
+                    self.draw(seat)
+                self.draw_amount = 0
+                playable = self.playable(seat)
+                while not playable and deck:
+                    self.draw(seat)
+                    playable = self.playable(seat)
+                if playable:
+                    return
+                self.passes += 1
+                if self.passes == players:
+                    self.color = rng.randrange(len(Deck.colors))
+                    self.passes = 0
+            self.turn = (seat + self.step) % players
+
+    def best_color(self, seat):
+        '''Returns the Deck.colors index 'seat' holds the most cards of.'''
+        held = self.counts[seat]
+        totals = [sum(held[color*13:color*13 + 13]) for color in range(len(Deck.colors))]
+        return totals.index(max(totals))
+
+    def rollout(self, rng, limit=1000):
+        '''Plays random cards, keeping wilds for when nothing else plays, until a seat wins.
+
+        Returns the winning seat, or None if 'limit' moves pass first.'''
+        while self.winner == None and limit:
+            playable = self.playable(self.turn)
+            codes = list(iter_codes(playable & COLORED_MASK or playable))
+            move = codes[rng.randrange(len(codes))]
+            if move >= WILD_CODE:
+                move = WILD_CODE + (move - WILD_CODE)*4 + self.best_color(self.turn)
+            self.apply(move, rng)
+            limit -= 1
+        return self.winner
+
+class _SearchNode:
+
+    __slots__ = ('parent', 'seat', 'children', 'visits', 'available', 'wins')
+
+    def __init__(self, parent=None, seat=None):
+        self.parent = parent
+        self.seat = seat                    #    Seat whose move led here
+        self.children = {}                  #    Move : _SearchNode
+        self.visits = 0
+        self.available = 1                  #    Iterations in which this move was legal
+        self.wins = 0
+
+def ismcts_search(observation, deadline, seed=None, exploration=0.7):
+    '''Runs single observer ISMCTS from 'observation' until time.monotonic() reaches 'deadline'.
+
+    Each iteration samples a determinization, descends the tree through the
+    moves legal in it by UCB over availability counts, expands one move and
+    finishes with a rollout. Returns {move : visits} at the root; results
+    from independent searches are summed.'''
+    rng = random.Random(seed)
+    root = _SearchNode()
+    while True:
+        state = SearchState.sample(observation, rng)
+        node = root
+        while state.winner == None:
+            moves = state.actions()
+            untried = [move for move in moves if move not in node.children]
+            if untried:
+                move = untried[rng.randrange(len(untried))]
+                node.children[move] = _SearchNode(node, state.turn)
+                node = node.children[move]
+                state.apply(move, rng)
+                break
+            best_score = -1.0
+            for move in moves:
+                child = node.children[move]
+                child.available += 1
+                score = child.wins / child.visits + exploration*math.sqrt(math.log(child.available) / child.visits)
+                if score > best_score:
+                    best_move, best_score = move, score
+            node = node.children[best_move]
+            state.apply(best_move, rng)
+        winner = state.rollout(rng)
+        while node != None:
+            node.visits += 1
+            if winner != None and node.seat == winner:
+                node.wins += 1
+            node = node.parent
+        if time.monotonic() >= deadline:
+            return {move : child.visits for move, child in root.children.items()}
+
+### Endgame ###
+
+class _EndgameLimit(Exception):
+    pass
+
+class EndgameSolver:
+    '''Exact max-n search of a match whose deck is empty.
+
+    With nothing left to draw, a turn either plays a card or passes, and once
+    everyone has passed a forced wild names a random color; so when every hand
+    is known the rest of the match can be searched exactly. Positions are
+    keyed on each seat's sorted card codes, the top color and value indices,
+    turn, direction, passes and a pending skip, and valued as every seat's
+    chance of winning with each seat playing for itself. Values are kept in
+    an LRU cache of 'capacity' positions.'''
+
+    def __init__(self, zero_change=False, capacity=200000, node_limit=5000):
+        self.zero_change = zero_change
+        self.capacity = capacity
+        self.node_limit = node_limit        #    New positions one best_move may search
+        self.cache = collections.OrderedDict()
+        self.nodes = 0
+
+    def best_move(self, hands, color, value, turn, step, passes=0):
+        '''Returns the search move for seat 'turn' in a position, or None if it
+        has none or the search would pass 'node_limit'.
+
+        'hands' (tuple) : per seat, a sorted tuple of card codes.'''
+        self.nodes = 0
+        try:
+            return self.search(hands, color, value, turn, step, passes, False)[1]
+        except _EndgameLimit:
+            return None
+
+    def playable(self, hand, color, value):
+        mask = 0
+        for code in hand:
+            mask |= 1 << code
+        return SearchState.playable_mask(mask, color, value, self.zero_change)
+
+    def search(self, hands, color, value, turn, step, passes, skip):
+        '''Returns (win chances per seat, best move) with 'turn' about to play.'''
+        key = (hands, color, value, turn, step, passes, skip)
+        cached = self.cache.get(key)
+        if cached != None:
+            self.cache.move_to_end(key)
+            return cached
+        self.nodes += 1
+        if self.nodes > self.node_limit:
+            raise _EndgameLimit()
+        players = len(hands)
+        following = (turn + step) % players
+        best = (None, None)
+        if skip:
+            best = (self.search(hands, color, value, following, step, passes, False)[0], None)
+        elif not self.playable(hands[turn], color, value):
+            if passes + 1 < players:
+                best = (self.search(hands, color, value, following, step, passes + 1, False)[0], None)
+            else:
+                best = (self.forced_wild(hands, value, following, step), None)
+        else:
+            for move in SearchState.moves(self.playable(hands[turn], color, value)):
+                code, move_color, move_value = SearchState.decode(move)
+                hand = hands[turn]
+                index = hand.index(code)
+                hand = hand[:index] + hand[index+1:]
+                if not hand:
+                    chances = tuple(float(seat == turn) for seat in range(players))
+                else:
+                    after = hands[:turn] + (hand,) + hands[turn+1:]
+                    move_step = -step if move_value == 11 and players > 2 else step
+                    move_skip = move_value == 10 or (move_value == 11 and players == 2)
+                    chances = self.search(after, move_color, move_value, (turn + move_step) % players, move_step, 0, move_skip)[0]
+                if best[0] == None or chances[turn] > best[0][turn]:
+                    best = (chances, move)
+        self.cache[key] = best
+        if len(self.cache) > self.capacity:
+            self.cache.popitem(False)
+        return best
+
+    def forced_wild(self, hands, value, turn, step):
+        '''Returns win chances after a forced wild.
+
+        A color nobody can play on brings everyone round to the same forced wild
+        again, so the chances are the mean over the colors someone can play.'''
+        live = [color for color in range(len(Deck.colors))
+                if any(self.playable(hand, color, value) for hand in hands)]
+        if not live:
+            return tuple(0.0 for hand in hands)
+        totals = [0.0]*len(hands)
+        for color in live:
+            for seat, chance in enumerate(self.search(hands, color, value, turn, step, 0, False)[0]):
+                totals[seat] += chance
+        return tuple(total / len(live) for total in totals)
+
+class SearchComputerPlayer(ComputerPlayer):
+    '''ComputerPlayer choosing moves by information set Monte Carlo tree search.
+
+    'think_time' (float) : Seconds per move. The search is anytime, so this
+                           bounds each decision whatever the hand sizes.
+    'workers' (int)      : Processes searching independent trees whose root
+                           visits are summed, defaults to the number of cores.'''
+
+    result_grace = 0.05     #    Seconds to wait past the deadline for a worker's result
+    strategy = 'ismcts'
+
+    def __init__(self, name, think_time=1.0, workers=None):
+        super().__init__(name)
+        self.think_time = think_time
+        self.workers = workers
+        self.rng = random.Random()
+
+    def think(self, match):
+        self.current_color = match.current_color
+        self.get_legal_cards(match.current_color, match.current_value, match.zero_change)
+        if not self.has_valid_card():
+            return "d"
+        move = self.solve_endgame(match)
+        if move == None:
+            moves = SearchState.moves(self.legal_mask | self.wild_mask | self.zero_mask)
+            if len(moves) == 1:
+                move = moves[0]
+            else:
+                visits = self.search(self.observe(match))
+                move = max(moves, key=lambda move: visits.get(move, 0))
+        return self.play_move(move)
+
+    def observe(self, match):
+        '''Returns what this player can see of 'match' as a picklable tuple.'''
+        seats = match.turn_list
+        return (tuple(card.code for card in self.hand),
+                tuple(card.code for card in match.pile),
+                tuple(match.players[identity].get_card_num() for identity in seats),
+                match.seat_index[self.id],
+                Deck.colors.index(match.current_color),
+                SEARCH_VALUES.index(match.current_value),
+                -1 if match.reverse else 1,
+                match.passes,
+                match.zero_change,
+                tuple(sum(1 << index for index, color in enumerate(Deck.colors) if match.tracker.is_void(identity, color))
+                      for identity in seats),
+                match.decks)
+
+    def search(self, observation):
+        '''Searches on every worker until the deadline and returns the summed root visits.
+
+        Results arriving later than 'result_grace' after the deadline are dropped.'''
+        deadline = time.monotonic() + self.think_time
+        workers = self.workers or os.cpu_count() or 1
+        results = []
+        pool = get_search_pool(workers - 1) if workers > 1 else None
+        if pool != None:
+            for i in range(workers - 1):
+                i #unused
+                results.append(pool.apply_async(ismcts_search, (observation, deadline, self.rng.getrandbits(32))))
+        visits = ismcts_search(observation, deadline, self.rng.getrandbits(32))
+        for result in results:
+            try:
+                worker_visits = result.get(max(0.0, deadline - time.monotonic()) + self.result_grace)
+            except multiprocessing.TimeoutError:
+                continue
+            for move in worker_visits:
+                visits[move] = visits.get(move, 0) + worker_visits[move]
+        return visits
+
+_search_pool = None         #    Worker processes shared by every SearchComputerPlayer
+_search_pool_size = 0
+
+def get_search_pool(processes):
+    '''Returns the shared search pool, started on first use and restarted
+    larger if 'processes' outgrows it. Daemonic processes, such as tournament
+    workers, cannot have children and get None, searching alone.'''
+    global _search_pool, _search_pool_size
+    if multiprocessing.current_process().daemon:
+        return None
+    if _search_pool == None or _search_pool_size < processes:
+        close_search_pool()
+        _search_pool = multiprocessing.Pool(processes)
+        _search_pool_size = processes
+    return _search_pool
+
+@atexit.register
+def close_search_pool():
+    global _search_pool, _search_pool_size
+    if _search_pool != None:
+        _search_pool.terminate()
+        _search_pool = None
+        _search_pool_size = 0
+
+### Match Statistics ###
+#   Aggregates finished matches into running sums that stay the same size
+#   however many matches go in; merge() combines aggregates from separate
+#   workers. Everything but win rates and points is read from Match.log.
+ACTION_VALUES = tuple(SearchState.decode(action)[2] for action in range(MOVE_DRAW))     #    SEARCH_VALUES index per action
+FORCED_DRAWS = tuple({'+2':2, '+4':4}.get(value, 0) for value in SEARCH_VALUES)
+
+class RunningStat:
+    '''Count, mean and variance of a stream of numbers by Welford's method.'''
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0                       #    Sum of squared differences from the mean
+        self.low = None
+        self.high = None
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.low = x if self.low == None else min(self.low, x)
+        self.high = x if self.high == None else max(self.high, x)
+
+    def merge(self, other):
+        '''Folds in 'other' as if its numbers had been added here (Chan et al.).'''
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.low = other.low if self.low == None else min(self.low, other.low)
+        self.high = other.high if self.high == None else max(self.high, other.high)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+class LogHistogram:
+    '''Counts of non-negative ints in buckets 1/16th of an octave wide, so
+    quantiles are within about 6% and the buckets number at most a few
+    hundred whatever the values. Histograms merge by adding counts.'''
+
+    exact = 32                              #    Values below this get a bucket each
+
+    def __init__(self):
+        self.counts = {}                    #    Bucket : Count
+        self.total = 0
+
+    def bucket(self, x):
+        if x < self.exact:
+            return x
+        shift = x.bit_length() - 5
+        return 16*shift + (x >> shift)
+
+    def bound(self, bucket):
+        '''Returns the lowest value falling in 'bucket'.'''
+        if bucket < self.exact:
+            return bucket
+        shift = bucket // 16 - 1
+        return (bucket - 16*shift) << shift
+
+    def add(self, x, count=1):
+        bucket = self.bucket(x)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += count
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        return self
+
+    def quantile(self, q):
+        '''Returns the lowest value of the bucket holding the 'q' quantile, None if empty.'''
+        rank = q * self.total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank and seen > 0:
+                return self.bound(bucket)
+        return None
+
+class MatchStats:
+    '''Running statistics over finished matches, from simulate() or live play.
+
+    add_match() must see a match before Match.end() tallies it. Per player
+    type and strategy it keeps seats, wins and points per seat; per match the
+    turns taken (plays and passes, skipped turns aside); and overall the plays
+    of every card value, voluntary draws, passes, cards forced on the next
+    player by draw cards played (draw_amount, the first card's aside) and
+    wilds forced by everyone passing.'''
+
+    def __init__(self):
+        self.matches = 0
+        self.aborted = 0
+        self.turns = RunningStat()
+        self.turn_histogram = LogHistogram()
+        self.seats = {}                     #    (Type, Strategy) : [Seats, Wins]
+        self.points = {}                    #    (Type, Strategy) : RunningStat of points per seat
+        self.plays = [0]*len(SEARCH_VALUES)
+        self.draws = 0
+        self.passes = 0
+        self.forced_draws = 0
+        self.forced_wilds = 0
+
+    def add_match(self, match):
+        if match.match_abort or not match.is_complete():
+            self.aborted += 1
+            return
+        self.matches += 1
+        points = match.winner_points()
+        for identity in match.turn_list:
+            player = match.players[identity]
+            group = (player.get_type(), player.strategy)
+            seats = self.seats.setdefault(group, [0, 0])
+            seats[0] += 1
+            seats[1] += identity == match.winner_id
+            self.points.setdefault(group, RunningStat()).add(points if identity == match.winner_id else 0)
+
+        actions = bytes(match.log[match.opening:])
+        counts = collections.Counter(actions)
+        draws = counts.pop(MOVE_DRAW, 0)
+        passes = counts.pop(MOVE_PASS, 0)
+        for action, count in counts.items():
+            value = ACTION_VALUES[action]
+            self.plays[value] += count
+            self.forced_draws += FORCED_DRAWS[value] * count
+        if actions and actions[-1] < MOVE_DRAW:
+            self.forced_draws -= FORCED_DRAWS[ACTION_VALUES[actions[-1]]]     #    The winning card forces nothing
+        if passes:
+            run = 0
+            for action in actions:
+                if action == MOVE_PASS:
+                    run += 1
+                    if run == match.pass_max:
+                        self.forced_wilds += 1
+                        run = 0
+                elif action != MOVE_DRAW:
+                    run = 0
+        self.draws += draws
+        self.passes += passes
+        turns = len(actions) - draws
+        self.turns.add(turns)
+        self.turn_histogram.add(turns)
+
+    def merge(self, other):
+        '''Folds in another MatchStats, as from a tournament worker.'''
+        self.matches += other.matches
+        self.aborted += other.aborted
+        self.turns.merge(other.turns)
+        self.turn_histogram.merge(other.turn_histogram)
+        for group, (seats, wins) in other.seats.items():
+            totals = self.seats.setdefault(group, [0, 0])
+            totals[0] += seats
+            totals[1] += wins
+            self.points.setdefault(group, RunningStat()).merge(other.points[group])
+        for value in range(len(self.plays)):
+            self.plays[value] += other.plays[value]
+        self.draws += other.draws
+        self.passes += other.passes
+        self.forced_draws += other.forced_draws
+        self.forced_wilds += other.forced_wilds
+        return self
+
+def format_stats(stats):
+    matches = max(stats.matches, 1)
+    output = '{} matches ({} aborted), {:.1f} turns each (sd {:.1f}, median {}, 95th percentile {}, longest {})\n'.format(
+        stats.matches, stats.aborted, stats.turns.mean, math.sqrt(stats.turns.variance),
+        stats.turn_histogram.quantile(0.5), stats.turn_histogram.quantile(0.95), stats.turns.high)
+    for group in sorted(stats.seats):
+        seats, wins = stats.seats[group]
+        points = stats.points[group]
+        output += '  {:<8} {:<10} {:>6.1%} wins {:>8.1f} points per seat (sd {:.1f})\n'.format(
+            group[0], group[1], wins / seats, points.mean, math.sqrt(points.variance))
+    output += '  Per match: {:.2f} draws, {:.2f} cards forced by draw cards, {:.2f} passes, {:.3f} forced wilds\n'.format(
+        stats.draws / matches, stats.forced_draws / matches, stats.passes / matches, stats.forced_wilds / matches)
+    output += '  Plays per match:'
+    for value, name in enumerate(SEARCH_VALUES):
+        output += ' {} {:.2f}'.format(name, stats.plays[value] / matches)
+    return output + '\n'
+
+### Training Environments ###
+#   The agent holds seat 0 (play1) against ComputerPlayers. Actions are
+#   Match.apply() actions; observations are float32 rows of the hand's copies
+#   per card code, the top card's code and the current color one-hot, the
+#   other seats' card counts in seat order, then draw_amount.
+ENV_ACTIONS = MOVE_PASS + 1
+
+def observation_size(players):
+    return 2*len(CARD_FACES) + len(Deck.colors) + players
+
+class UnoEnv:
+    '''A Match as a reset()/step() environment, with no rendering or input.
+
+    step() applies the agent's action and plays the computer turns after it,
+    returning (observation, reward, done, info). The reward is zero until the
+    match ends, then the points the winner scores in Match.end(): positive if
+    the agent won, negative otherwise.'''
+
+    def __init__(self, players=2, seed=None):
+        if np == None:
+            raise BadInputError('Training Environments Require NumPy')
+        if not 2 <= players <= GameSettings.max_players:
+            raise BadInputError('Environments Require 2 to {} Players'.format(GameSettings.max_players))
+        self.players = players
+        self.rng = random.Random(seed)
+        self.settings = GameSettings()
+        self.settings.computer_simulation = True
+        self.settings.display_effects = False
+        self.agent = Player('Agent')
+        self.settings.add_player(self.agent)
+        for i in range(players - 1):
+            i #unused
+            self.settings.add_player(ComputerPlayer(self.settings.get_computer_name()))
+        self.settings.finalize_players()
+        self.match = None
+
+    def reset(self):
+        for player in self.settings.players.values():
+            player.discard_hand()
+            player.remove_force_draw()
+            player.begin_turn()
+        m = self.match = Match(self.settings, self.rng.getrandbits(32))
+        m.start(ask=False)
+        if m.event == 'wild':
+            player = m.players[m.turn]
+            if player == self.agent:
+                player = ComputerSource().get_advisor(player)
+            m.name_first_color(player.get_wild_color(m))
+        self.advance()
+        return self.observe()
+
+    def advance(self):
+        '''Plays computer turns until the agent is on turn or the match is over.'''
+        m = self.match
+        while not m.is_complete() and m.turn != self.agent.get_id():
+            m.apply(m.players[m.turn].choose_action(m))
+
+    def step(self, action):
+        if action not in self.match.legal_actions():
+            raise BadInputError('Illegal Action {}'.format(action))
+        self.match.apply(action)
+        self.advance()
+        reward = 0.0
+        if self.match.is_complete():
+            reward = float(self.match.winner_points())
+            if self.match.winner_id != self.agent.get_id():
+                reward = -reward
+        return self.observe(), reward, self.match.is_complete(), {}
+
+    def legal_mask(self):
+        mask = np.zeros(ENV_ACTIONS, dtype=bool)
+        if not self.match.is_complete():
+            mask[self.match.legal_actions()] = True
+        return mask
+
+    def observe(self):
+        m = self.match
+        faces = len(CARD_FACES)
+        observation = np.zeros(observation_size(self.players), dtype=np.float32)
+        observation[:faces] = self.agent.hand.counts
+        observation[faces + m.pile[0].code] = 1
+        observation[2*faces + Deck.colors.index(m.current_color)] = 1
+        observation[2*faces + len(Deck.colors):-1] = [m.players[identity].get_card_num() for identity in m.turn_list[1:]]
+        observation[-1] = m.draw_amount
+        return observation
+
+class VectorUnoEnv(BatchSimulator):
+    '''Many UnoEnv games stepped together on the BatchSimulator arrays.
+
+    step() takes one action per game and returns stacked observations,
+    rewards and done flags; finished games are dealt again at once, so every
+    row always waits on an agent decision. The computer seats play the
+    vectorized heuristic.'''
+
+    def __init__(self, players=2, n_envs=1024, seed=None):
+        super().__init__(players, n_envs, seed)
+
+    def reset(self):
+        super().reset()
+        self.advance(np.arange(self.n_games))
+        return self.observe()
+
+    def advance(self, games):
+        '''Plays the turns in 'games' up to the next agent decision or the end of the game.'''
+        while len(games):
+            playing = self.start_turns(games)
+            agent = playing[self.turn[playing] == 0]
+            others = playing[self.turn[playing] != 0]
+            self.take_turns(others)
+            moving = np.setdiff1d(games, agent, assume_unique=True)
+            self.turn[moving] = (self.turn[moving] + self.direction[moving]) % self.players
+            games = moving[~self.done[moving]]
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        games = np.arange(self.n_games)
+        legal = self.legal_mask()[games, actions]
+        if not legal.all():
+            raise BadInputError('Illegal Action in Games {}'.format(np.nonzero(~legal)[0].tolist()))
+        drawing = games[actions == MOVE_DRAW]
+        if len(drawing):
+            self.draw(drawing, self.turn[drawing])
+        passing = games[actions == MOVE_PASS]
+        if len(passing):
+            self.pass_turn(passing)
+        playing = games[actions < MOVE_DRAW]
+        if len(playing):
+            moves = actions[playing]
+            wild = moves >= WILD_CODE
+            codes = np.where(wild, WILD_CODE + (moves - WILD_CODE) // 4, moves)
+            seats = self.turn[playing]
+            self.hands[playing, seats, codes] -= 1
+            won = self.hands[playing, seats].sum(axis=1) == 0
+            self.done[playing[won]] = True
+            self.winner[playing[won]] = seats[won]
+            self.place(playing, seats, codes, np.where(wild, (moves - WILD_CODE) % 4, 0))
+        moving = games[actions != MOVE_DRAW]
+        self.turn[moving] = (self.turn[moving] + self.direction[moving]) % self.players
+        self.advance(moving[~self.done[moving]])
+
+        done = self.done.copy()
+        points = (self.hands * self.points).sum(axis=(1, 2))
+        rewards = np.where(done, np.where(self.winner == 0, points, -points), 0).astype(np.float32)
+        finished = np.nonzero(done)[0]
+        if len(finished):
+            self.deal(finished)
+            self.advance(finished)
+        return self.observe(), rewards, done
+
+    def legal_mask(self):
+        '''Returns a (games, ENV_ACTIONS) mask of the agent's legal actions, as Match.legal_actions.'''
+        hands = self.hands[:, 0]
+        legal = (hands > 0) & self.legal[self.color, self.value]
+        has_legal = legal.any(axis=1)
+        mask = np.zeros((self.n_games, ENV_ACTIONS), dtype=bool)
+        mask[:, :WILD_CODE] = legal[:, :WILD_CODE]
+        mask[:, WILD_CODE:WILD_CODE + 4] = (hands[:, WILD_CODE] > 0)[:, None]
+        mask[:, WILD_CODE + 4:MOVE_DRAW] = ((hands[:, DRAW_FOUR_CODE] > 0) & ~has_legal)[:, None]
+        mask[:, MOVE_DRAW] = self.deck_len > 0
+        mask[:, MOVE_PASS] = ~mask[:, :MOVE_PASS].any(axis=1)
+        return mask
+
+    def observe(self):
+        n, faces = self.n_games, len(CARD_FACES)
+        observation = np.zeros((n, observation_size(self.players)), dtype=np.float32)
+        rows = np.arange(n)
+        observation[:, :faces] = self.hands[:, 0]
+        observation[rows, faces + self.top] = 1
+        observation[rows, 2*faces + self.color] = 1
+        observation[:, 2*faces + len(Deck.colors):-1] = self.hands[:, 1:].sum(axis=2)
+        observation[:, -1] = self.draw_amount
+        return observation
+
+### Benchmarks ###
+#   Each benchmark sets up its fixtures from fixed seeds and returns a
+#   function to time, so every run measures the same work. Timings are the
+#   best of several autoranged rounds, in seconds per call; memory figures
+#   are the average peak bytes allocated while a match is played.
+#   bench-baseline.json holds reference results; timings only compare on
+#   the machine they came from, so record a local baseline before a change
+#   with 'bench -o baseline.json' and check the change with 'bench -b baseline.json'.
+BENCH_SEED = 2024
+BENCH_MATCHES = 10          #    Seeded matches per headless match benchmark call
+
+def bench_match(players=4, actions=20):
+    '''Returns a started computer-only Match 'actions' seeded moves in, drawable as if on screen.'''
+    gs = build_simulation_settings(players)
+    gs.finalize_players()
+    m = Match(gs, BENCH_SEED)
+    m.start()
+    rng = random.Random(BENCH_SEED)
+    for i in range(actions):
+        i #unused
+        m.apply(rng.choice(m.legal_actions()))
+    m.journal.clear()
+    return m
+
+def bench_legal_cards():
+    m = bench_match()
+    players = [m.players[identity] for identity in m.turn_list]
+    positions = [(color, value) for color in Deck.colors for value in Deck.values]
+    def run():
+        for color, value in positions:
+            for player in players:
+                player.get_legal_cards(color, value)
+    return run, len(positions) * len(players)
+
+def bench_think():
+    m = bench_match()
+    player = m.players[m.turn]
+    def run():
+        player.think(m)
+    return run, 1
+
+def bench_hand_show():
+    deck = Deck(True, random.Random(BENCH_SEED))
+    hand = Hand()
+    for i in range(20):
+        i #unused
+        hand.add_card(deck.draw())
+    def run():
+        hand.invalidate()
+        hand.show()
+    return run, 1
+
+def bench_big_num():
+    cards = [Card(color, value) for color, value in CARD_FACES]
+    def run():
+        for card in cards:
+            card.get_big_num(False)
+            card.get_big_num(True, 2)
+    return run, 2 * len(cards)
+
+def bench_draw_screen():
+    m = bench_match()
+    m.simulation = False
+    view = m.view
+    fields = set(view.dirty) | {'names', 'deck', 'pile', 'turns', 'hand', 'Console', 'Error'}
+    def run():
+        view.dirty.update(fields)
+        view.dirty_cards.update(m.players)
+        m.draw_screen()
+    return run, 1
+
+def play_bench_match(gs, seed):
+    gs.finalize_players()
+    m = Match(gs, seed)
+    m.begin()
+    while not m.is_complete():
+        m.next_turn()
+    return m.end(gs)
+
+def bench_headless(players):
+    def setup():
+        gs = build_simulation_settings(players)
+        def run():
+            for seed in range(BENCH_SEED, BENCH_SEED + BENCH_MATCHES):
+                play_bench_match(gs, seed)
+        return run, BENCH_MATCHES
+    return setup
+
+def bench_match_memory(players):
+    '''Returns the average peak bytes traced while one seeded headless match is played.'''
+    gs = build_simulation_settings(players)
+    play_bench_match(gs, BENCH_SEED - 1)          #    Warm the render and search caches first
+    peaks = 0
+    tracemalloc.start()
+    try:
+        for seed in range(BENCH_SEED, BENCH_SEED + BENCH_MATCHES):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            play_bench_match(gs, seed)
+            peaks += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return peaks / BENCH_MATCHES
+
+BENCHMARKS = (          #    Name : Setup returning (function, calls per run)
+    ('legal_cards', bench_legal_cards),
+    ('think', bench_think),
+    ('hand_show', bench_hand_show),
+    ('big_num', bench_big_num),
+    ('draw_screen', bench_draw_screen),
+    ('match_2p', bench_headless(2)),
+    ('match_4p', bench_headless(4)),
+    )
+MEMORY_BENCHMARKS = (
+    ('match_2p_memory', 2),
+    ('match_4p_memory', 4),
+    )
+
+def run_benchmarks(names=None, repeat=5):
+    '''Runs the benchmarks named in 'names' (default all) and returns a results dict.
+
+    Timings autorange each round to at least 0.2s and keep the fastest of
+    'repeat' rounds, the figure least disturbed by the rest of the machine.'''
+    results = {}
+    for name, setup in BENCHMARKS:
+        if names and name not in names:
+            continue
+        function, calls = setup()
+        timer = timeit.Timer(function)
+        number = timer.autorange()[0]
+        rounds = [seconds / (number * calls) for seconds in timer.repeat(repeat, number)]
+        results[name] = {'unit' : 's', 'value' : min(rounds), 'rounds' : rounds, 'calls' : number * calls}
+    for name, players in MEMORY_BENCHMARKS:
+        if names and name not in names:
+            continue
+        results[name] = {'unit' : 'B', 'value' : bench_match_memory(players)}
+    return {'python' : platform.python_version(), 'implementation' : platform.python_implementation(),
+            'machine' : platform.machine(), 'numpy' : np != None, 'seed' : BENCH_SEED, 'results' : results}
+
+def compare_benchmarks(report, baseline, threshold=0.10):
+    '''Returns (name, baseline value, value, ratio) for every result more than
+    'threshold' slower or larger than in 'baseline'. Results missing from
+    either side are not compared.'''
+    regressions = []
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if before == None or before['value'] <= 0:
+            continue
+        ratio = result['value'] / before['value']
+        if ratio > 1 + threshold:
+            regressions.append((name, before['value'], result['value'], ratio))
+    return regressions
+
+def format_measure(value, unit):
+    if unit == 'B':
+        return '{:.1f} KiB'.format(value / 1024)
+    for scale, suffix in ((1, 's'), (1e-3, 'ms'), (1e-6, 'us')):
+        if value >= scale:
+            return '{:.2f} {}'.format(value / scale, suffix)
+    return '{:.1f} ns'.format(value / 1e-9)
+
+def format_benchmarks(report, baseline=None):
+    output = ''
+    for name, result in report['results'].items():
+        line = '  {:<16} {:>12}'.format(name, format_measure(result['value'], result['unit']))
+        if baseline != None and name in baseline['results'] and baseline['results'][name]['value'] > 0:
+            line += ' {:>+8.1%}'.format(result['value'] / baseline['results'][name]['value'] - 1)
+        output += line + '\n'
+    return output
+
+def format_report(report):
+    output = '{} games, {} turns in {:.2f}s ({:.1f} games/s)\n'.format(
+        report['games'], report['turns'], report['seconds'], report['games_per_second'])
+    for name in sorted(report['wins'], key=report['wins'].get, reverse=True):
+        output += '  {:<11} {:>7} wins {:>10} points\n'.format(name, report['wins'][name], report['points'][name])
+    return output
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Text based UNO.')
+    parser.add_argument('--log-dir', default=None, help='save a replay log of every match played, simulated or in a tournament here')
+    parser.add_argument('--scores', default=None,
+                        help='record every match played, simulated or in a tournament in this SQLite leaderboard, '
+                             'such as {}; no scores are kept without it'.format(GameSettings.default_score_path))
+    commands = parser.add_subparsers(dest='command')
+    sim = commands.add_parser('simulate', help='Run computer-only matches headless.')
+    sim.add_argument('-p', '--players', type=int, default=2)
+    sim.add_argument('-n', '--games', type=int, default=100)
+    sim.add_argument('-s', '--seed', type=int, default=None)
+    sim.add_argument('--reshuffle', action='store_true', help='shuffle the pile back in when the deck runs out')
+    sim.add_argument('--stats', action='store_true', help='also print match length, strategy and card statistics')
+    tour = commands.add_parser('tournament', help='Run computer-only matches across all cores.')
+    tour.add_argument('-p', '--players', type=int, default=2)
+    tour.add_argument('-n', '--games', type=int, default=10000)
+    tour.add_argument('-s', '--seed', type=int, default=None)
+    tour.add_argument('-w', '--workers', type=int, default=None)
+    tour.add_argument('--reshuffle', action='store_true', help='shuffle the pile back in when the deck runs out')
+    tour.add_argument('--stats', action='store_true', help='also print match length, strategy and card statistics')
+    coord = commands.add_parser('coordinate', help='Hand out simulation batches to remote workers.')
+    coord.add_argument('address', help='host:port or Unix socket path to listen on')
+    coord.add_argument('-p', '--players', type=int, default=2)
+    coord.add_argument('-n', '--games', type=int, default=10000)
+    coord.add_argument('-s', '--seed', type=int, default=None)
+    coord.add_argument('-b', '--batch-size', type=int, default=50)
+    coord.add_argument('-l', '--lease-timeout', type=float, default=60.0)
+    work = commands.add_parser('work', help='Play simulation batches for a coordinator.')
+    work.add_argument('address', help='host:port or Unix socket path to connect to')
+    batch = commands.add_parser('batch', help='Run computer-only matches in lockstep with NumPy.')
+    batch.add_argument('-p', '--players', type=int, default=2)
+    batch.add_argument('-n', '--games', type=int, default=10000)
+    batch.add_argument('-s', '--seed', type=int, default=None)
+    batch.add_argument('--check', action='store_true', help='compare against Match turn by turn instead')
+    serve = commands.add_parser('serve', help='Host matches for telnet or nc clients.')
+    serve.add_argument('address', nargs='?', default='127.0.0.1:4000', help='host:port or Unix socket path to listen on')
+    replay = commands.add_parser('replay', help='Show a position from a saved match log.')
+    replay.add_argument('log', help='file written by --log-dir')
+    replay.add_argument('-a', '--actions', type=int, default=None, help='actions to play (default: all)')
+    replay.add_argument('--resume', action='store_true', help='let the current computer players finish the match from there')
+    bench = commands.add_parser('bench', help='Time the engine, computer player and renderer hot paths.')
+    bench.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+    bench.add_argument('-r', '--repeat', type=int, default=5)
+    bench.add_argument('-o', '--output', default=None, help='write the results here as JSON')
+    bench.add_argument('-b', '--baseline', default=None, help='JSON results to compare against, as written by -o')
+    bench.add_argument('-t', '--threshold', type=float, default=0.10, help='slowdown over the baseline to fail on (default: 0.10)')
+    board = commands.add_parser('scores', help='Show the leaderboard or one player\'s recent matches.')
+    board.add_argument('player', nargs='?', default=None)
+    board.add_argument('-n', '--count', type=int, default=10)
+    args = parser.parse_args(argv)
+    if args.log_dir != None and args.command not in (None, 'simulate', 'tournament'):
+        parser.error('--log-dir is not used by {}'.format(args.command))
+    scores = ScoreStore(args.scores) if args.scores != None else None
+
+    if args.command == 'simulate':
+        report = simulate(args.players, args.games, args.seed, reshuffle_pile=args.reshuffle, scores=scores,
+                          stats=MatchStats() if args.stats else None, log_dir=args.log_dir)
+        print(format_report(report), end='')
+        if args.stats:
+            print(format_stats(report['stats']), end='')
+    elif args.command == 'tournament':
+        report = tournament(args.players, args.games, args.seed, args.workers, reshuffle_pile=args.reshuffle, scores=scores,
+                            stats=MatchStats() if args.stats else None, log_dir=args.log_dir)
+        print(format_report(report), end='')
+        if args.stats:
+            print(format_stats(report['stats']), end='')
+    elif args.command == 'batch':
+        if args.check:
+            turns = check_batch_equivalence(args.players, args.games, args.seed or 0)
+            print('{} games, {} turns identical to Match'.format(args.games, turns))
+        else:
+            print(format_report(BatchSimulator(args.players, args.games, args.seed).run()), end='')
+    elif args.command == 'coordinate':
+        coordinator = SimulationCoordinator(args.players, args.games, args.seed, args.batch_size, args.lease_timeout, args.address)
+        print(format_report(coordinator.run()), end='')
+    elif args.command == 'work':
+        simulation_worker(args.address)
+    elif args.command == 'serve':
+        GameServer(args.address).run()
+    elif args.command == 'replay':
+        with open(args.log, 'rb') as log_file:
+            player = ReplayPlayer(log_file.read())
+        player.seek(len(player) if args.actions == None else args.actions)
+        print(player.show())
+        print('\033[0mAction {} of {}, seed {}'.format(player.position, len(player), player.seed))
+        if args.resume:
+            m = player.resume()
+            print('{} wins'.format(m.get_player(m.winner_id).get_name()))
+    elif args.command == 'bench':
+        unknown = set(args.names) - {name for name, setup in BENCHMARKS} - {name for name, players in MEMORY_BENCHMARKS}
+        if unknown:
+            raise BadInputError('Unknown Benchmarks: {}'.format(', '.join(sorted(unknown))))
+        baseline = None
+        if args.baseline != None:
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        report = run_benchmarks(args.names, args.repeat)
+        print(format_benchmarks(report, baseline), end='')
+        if args.output != None:
+            with open(args.output, 'w') as output_file:
+                json.dump(report, output_file, indent=1)
+        if baseline != None:
+            regressions = compare_benchmarks(report, baseline, args.threshold)
+            for name, before, after, ratio in regressions:
+                print('Regression: {} {} -> {} ({:+.1%})'.format(name, format_measure(before, report['results'][name]['unit']),
+                                                             format_measure(after, report['results'][name]['unit']), ratio - 1))
+            if regressions:
+                sys.exit(1)
+    elif args.command == 'scores':
+        if scores == None:
+            if not os.path.exists(GameSettings.default_score_path):
+                raise BadInputError('No Scores Kept at {}, Play With --scores'.format(GameSettings.default_score_path))
+            scores = ScoreStore(GameSettings.default_score_path)
+        if args.player == None:
+            for rank, (name, points, wins, matches) in enumerate(scores.top(args.count), 1):
+                print('{:>3}. {:<11} {:>10} points {:>7} wins {:>7} matches'.format(rank, name, points, wins, matches))
+        else:
+            for played, seed, points, won in scores.history(args.player, args.count):
+                print('{}  seed {:<10} {:>5} points{}'.format(time.strftime('%Y-%m-%d %H:%M', time.localtime(played)), seed, points,
+                                                             '  won' if won else ''))
+    else:
+        Uno(log_dir=args.log_dir, score_path=args.scores)
+
 if __name__ == "__main__":
-    Uno()
-        
+    main()